@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
-from ..core.dependencies import get_db
+from ..core.dependencies import get_async_sessionmaker, get_db
 from ..models.domain import Account, AccountNodeType, CategoryType
+from ..services import account_service
+from .streaming import ndjson_response, page_limit, set_next_cursor, wants_ndjson
 
 router = APIRouter()
 
+def _account_out(acc: Account) -> dict:
+    return {"id": acc.id, "name": acc.name, "type": acc.type.value, "parent_id": acc.parent_id}
+
 @router.post("")
 def create_account(
     name: str,
@@ -13,25 +20,62 @@ def create_account(
     parent_id: int | None = None,
     db: Session = Depends(get_db),
 ):
-    if type == AccountNodeType.CATEGORY and parent_id is not None:
-        raise HTTPException(status_code=400, detail="CATEGORY cannot have a parent")
-    acc = Account(name=name, type=type, category_type=category_type, parent_id=parent_id)
-    db.add(acc)
-    db.commit()
-    db.refresh(acc)
-    return {"id": acc.id, "name": acc.name, "type": acc.type.value, "parent_id": acc.parent_id}
+    try:
+        acc = account_service.create_account(db, name, type, category_type, parent_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _account_out(acc)
+
+@router.patch("/{account_id}")
+def update_account(
+    account_id: int,
+    name: str | None = None,
+    parent_id: int | None = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Rename an account and/or move it (with its subtree) under a new parent.
+    """
+    try:
+        acc = account_service.update_account(db, account_id, name=name, parent_id=parent_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _account_out(acc)
+
+def _account_json(row) -> dict:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "type": row.type.value,
+        "category_type": row.category_type.value if row.category_type else None,
+        "parent_id": row.parent_id,
+    }
 
 @router.get("")
-def list_accounts(db: Session = Depends(get_db)):
-    # Return a flat list for now; front-end can build a tree.
-    q = db.query(Account).all()
-    return [
-        {
-            "id": a.id,
-            "name": a.name,
-            "type": a.type.value,
-            "category_type": a.category_type.value if a.category_type else None,
-            "parent_id": a.parent_id,
-        }
-        for a in q
-    ]
+def list_accounts(
+    response: Response,
+    after_id: int | None = None,
+    limit: int | None = Query(default=None, ge=1, le=10_000),
+    accept: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+    sessions: async_sessionmaker[AsyncSession] = Depends(get_async_sessionmaker),
+):
+    """
+    Flat, id-ordered list of accounts; the front-end builds the tree.
+    All accounts are returned unless limit or after_id is given; pages are
+    keyed on id via after_id / X-Next-Cursor, or streamed as NDJSON with
+    `Accept: application/x-ndjson`.
+    """
+    stmt = select(
+        Account.id, Account.name, Account.type, Account.category_type, Account.parent_id
+    ).order_by(Account.id)
+    if after_id is not None:
+        stmt = stmt.where(Account.id > after_id)
+    if wants_ndjson(accept):
+        return ndjson_response(stmt, _account_json, sessions)
+    limit = page_limit(after_id, limit)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    rows = [_account_json(r) for r in db.execute(stmt)]
+    set_next_cursor(response, rows, limit, lambda r: r["id"])
+    return rows
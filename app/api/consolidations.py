@@ -0,0 +1,64 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.dependencies import get_db, get_async_db
+from ..models.domain import ReportTemplate
+from ..schemas.consolidation_schemas import ConsolidationGroupCreate, ConsolidationGroupOut
+from ..services import consolidation_service, statement_generation_service
+from ..services.chart_service import get_chart_snapshot
+from ..services.template_plan_service import TemplateDefinitionError, get_render_plan
+from .statements import statement_response
+
+router = APIRouter()
+
+@router.post("", response_model=ConsolidationGroupOut, status_code=201)
+def create_group(payload: ConsolidationGroupCreate, db: Session = Depends(get_db)):
+    """
+    Define a group of works (one per company, same period end) to
+    consolidate; work_ids sets the order of the per-entity columns.
+    """
+    try:
+        return consolidation_service.create_group(db, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{group_id}", response_model=ConsolidationGroupOut)
+def get_group(group_id: int, db: Session = Depends(get_db)):
+    group = consolidation_service.get_group(db, group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Consolidation group not found")
+    return group
+
+@router.get("/{group_id}/statements/{template_id}")
+async def generate_consolidated_statement(
+    group_id: int,
+    template_id: int,
+    format: Literal["pdf", "xlsx"] = "pdf",
+    breakdown: bool = True,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Generate a consolidated statement for a group: the members' balances
+    are aggregated together in one query over the shared chart of
+    accounts. With breakdown=true (the default) the consolidated column is
+    followed by one column per entity. Cached and ETagged like the
+    per-work statement.
+    """
+    template = await db.get(ReportTemplate, template_id)
+    if not template:
+        raise HTTPException(status_code=404, detail="Report template not found")
+    try:
+        plan = get_render_plan(template)
+    except TemplateDefinitionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    works = await db.run_sync(consolidation_service.group_works, group_id)
+    if works is None:
+        raise HTTPException(status_code=404, detail="Consolidation group not found")
+    data = await db.run_sync(
+        statement_generation_service.get_consolidated_data, works, plan.account_ids, breakdown
+    )
+    chart = await db.run_sync(get_chart_snapshot)
+    return await statement_response(template, chart.labels(plan.account_ids), data, format, if_none_match)
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+from ..schemas.render_job_schemas import RenderJobOut
+from ..services import render_job_service
+from ..services.render_job_service import JobStatus, RenderJob
+
+router = APIRouter()
+
+def job_out(job: RenderJob) -> RenderJobOut:
+    return RenderJobOut(
+        id=job.id,
+        work_id=job.work_id,
+        template_id=job.template_id,
+        format=job.format,
+        status=job.status.value,
+        error=job.error(),
+    )
+
+def _get_job(job_id: str) -> RenderJob:
+    job = render_job_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Render job not found")
+    return job
+
+@router.get("/{job_id}", response_model=RenderJobOut)
+def get_render_job(job_id: str):
+    """
+    Poll the status of a statement render job.
+    """
+    return job_out(_get_job(job_id))
+
+@router.get("/{job_id}/artifact")
+def download_render_artifact(job_id: str):
+    """
+    Download the rendered statement once the job is DONE.
+    """
+    job = _get_job(job_id)
+    status = job.status
+    if status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error())
+    if status != JobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Render job is {status.value}")
+    return Response(
+        content=job.result(),
+        media_type=job.media_type,
+        headers={"Content-Disposition": f"attachment; filename={job.filename}"}
+    )
@@ -0,0 +1,48 @@
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from ..core.metrics import CACHE_LOOKUPS, span
+from ..models.domain import ReportTemplate
+from ..services import render_job_service, report_rendering_service
+from ..services.artifact_store import artifact_key, artifact_store
+from ..services.statement_generation_service import CalculatedData
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+async def statement_response(
+    template: ReportTemplate,
+    labels: dict[int, str],
+    data: CalculatedData,
+    format: str,
+    if_none_match: str | None = None,
+) -> Response:
+    """
+    Renders a statement, or serves it from the content-addressed artifact
+    cache, with a strong ETag; a matching If-None-Match returns 304
+    without rendering.
+    """
+    media_type = render_job_service.MEDIA_TYPES[format]
+    filename = f"{template.name}.{format}"
+    key = artifact_key(template, data, format, labels)
+    headers = {"ETag": f'"{key}"', "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    content = await run_in_threadpool(artifact_store.get, key)
+    CACHE_LOOKUPS.inc(1, "artifact", "miss" if content is None else "hit")
+    if content is None:
+        with span("render"):
+            if format == "pdf":
+                content = await run_in_threadpool(report_rendering_service.render_pdf, template, labels, data)
+            elif format == "xlsx":
+                content = await run_in_threadpool(report_rendering_service.render_excel, template, labels, data)
+        await run_in_threadpool(artifact_store.put, key, content)
+
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={**headers, "Content-Disposition": f"attachment; filename={filename}"}
+    )
@@ -0,0 +1,87 @@
+import json
+import zipfile
+from typing import Any, AsyncIterable, AsyncIterator, Callable
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+NDJSON = "application/x-ndjson"
+
+# Rows fetched per server-side cursor round trip.
+STREAM_BATCH_ROWS = 1000
+
+# Page size once a client starts paging with after_id but gives no limit.
+DEFAULT_PAGE_ROWS = 1000
+
+def wants_ndjson(accept: str | None) -> bool:
+    return bool(accept) and NDJSON in accept
+
+async def _ndjson_rows(
+    stmt: Select, encode: Callable[[Any], dict], sessions: async_sessionmaker[AsyncSession]
+) -> AsyncIterator[bytes]:
+    # Uses its own session: request-scoped dependencies are closed before
+    # a streaming body is sent.
+    async with sessions() as db:
+        result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH_ROWS))
+        async for rows in result.partitions():
+            yield "".join(json.dumps(encode(row)) + "\n" for row in rows).encode()
+
+def ndjson_response(
+    stmt: Select, encode: Callable[[Any], dict], sessions: async_sessionmaker[AsyncSession]
+) -> StreamingResponse:
+    """
+    Streams `stmt` as newline-delimited JSON straight from a server-side
+    cursor, one encoded object per row, on a session from `sessions`
+    (inject it with Depends(get_async_sessionmaker)).
+    """
+    return StreamingResponse(_ndjson_rows(stmt, encode, sessions), media_type=NDJSON)
+
+def page_limit(after_id: int | None, limit: int | None) -> int | None:
+    # Without after_id or limit the whole list is returned, as before
+    # paging existed.
+    if limit is None and after_id is not None:
+        return DEFAULT_PAGE_ROWS
+    return limit
+
+def set_next_cursor(response, rows: list, limit: int | None, last_id: Callable[[Any], int]) -> None:
+    # A full page means there may be more; clients pass it back as after_id.
+    if limit is not None and len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(last_id(rows[-1]))
+
+class _ZipSink:
+    # Write-only file object. ZipFile sees it cannot seek and writes data
+    # descriptors after each member, so the archive streams front to back.
+    def __init__(self):
+        self._parts: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+async def _zip_chunks(files: AsyncIterable[tuple[str, bytes]]) -> AsyncIterator[bytes]:
+    sink = _ZipSink()
+    # Stored, not deflated: PDF and XLSX content is already compressed.
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        async for name, content in files:
+            archive.writestr(name, content)
+            yield sink.drain()
+    yield sink.drain()
+
+def zip_response(files: AsyncIterable[tuple[str, bytes]], filename: str) -> StreamingResponse:
+    """
+    Streams (name, content) pairs as a ZIP archive, sending each member as
+    soon as it is produced instead of buffering the archive.
+    """
+    return StreamingResponse(
+        _zip_chunks(files),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
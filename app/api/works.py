@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
-from sqlalchemy.orm import Session
-from ..core.dependencies import get_db
-from ..models.domain import FinancialWork, WorkStatus, TrialBalanceEntry
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Header, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.concurrency import run_in_threadpool
+from ..core.dependencies import get_db, get_async_db, get_async_sessionmaker, get_sessionmaker
+from ..core.metrics import span
+from ..models.domain import FinancialWork, WorkStatus
 from ..schemas.work_schemas import WorkCreate, WorkOut
-from ..utils.csv_parser import parse_trial_balance_csv
-from ..schemas.mapping_schemas import MapEntryPayload, UnmappedEntryOut
+from ..schemas.mapping_schemas import MapEntryPayload, UnmappedEntryOut, BulkMapPayload, BulkMapResult, AutoMapResult
+from ..utils.uploads import UploadTooLarge
+from ..services.trial_balance_validation import TrialBalanceInvalid
 from typing import List
 
-from ..services import report_rendering_service, statement_generation_service
-from ..models.domain import ReportTemplate, Account
+from ..services import batch_export_service, mapping_service, render_job_service, report_rendering_service, statement_generation_service, trial_balance_service
+from ..services.render_job_service import RenderQueueFull
+from ..services.template_plan_service import TemplateDefinitionError, get_render_plan
+from ..services.chart_service import get_chart_snapshot
+from ..schemas.render_job_schemas import RenderJobOut, StatementBatchRequest
+from .render_jobs import job_out
+from .statements import statement_response
+from .streaming import ndjson_response, page_limit, set_next_cursor, wants_ndjson, zip_response
+from ..models.domain import ReportTemplate
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import Response
 from typing import Literal
 
@@ -28,36 +41,68 @@ def create_work(payload: WorkCreate, db: Session = Depends(get_db)):
     })
 
 @router.post("/{work_id}/trial-balance")
-async def upload_trial_balance(work_id: int, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    work = db.get(FinancialWork, work_id)
-    if not work:
+async def upload_trial_balance(
+    work_id: int,
+    file: UploadFile = File(...),
+    validation: Literal["strict", "warn", "off"] | None = None,
+    mode: Literal["append", "replace"] | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Upload a CSV or XLSX trial balance. The response includes a validation
+    report (capped at TB_VALIDATION_MAX_ISSUES issues); with
+    validation=strict a failing file is rejected with 422 and not stored.
+    mode=replace updates the existing entries in place by account name,
+    keeping the mappings of unchanged lines; re-sending the last uploaded
+    file in the same mode is a no-op reported as "duplicate": true.
+    """
+    try:
+        result = await trial_balance_service.process_trial_balance_upload(db, work_id, file, validation, mode)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except TrialBalanceInvalid as e:
+        raise HTTPException(status_code=422, detail=jsonable_encoder({"message": str(e), "validation": e.report}))
+    if result is None:
         raise HTTPException(status_code=404, detail="Work not found")
+    return result
 
-    content = await file.read()
-    rows = parse_trial_balance_csv(content)
-
-    entries = []
-    for r in rows:
-        entry = TrialBalanceEntry(
-            financial_work_id=work_id,
-            account_name=r["account_name"],
-            debit=r["debit"],
-            credit=r["credit"],
-            closing_balance=r["closing_balance"],
-        )
-        entries.append(entry)
-
-    db.add_all(entries)
-    db.commit()
-    return {"inserted": len(entries)}
 
+def _unmapped_entry_json(row) -> dict:
+    return {
+        "id": row.id,
+        "account_name": row.account_name,
+        "debit": float(row.debit or 0),
+        "credit": float(row.credit or 0),
+        "closing_balance": float(row.closing_balance or 0),
+    }
+
+# The mapping and statement endpoints below run the sync services in the
+# threadpool (plain `def` endpoints, or run_in_threadpool): their Python-side
+# work (model building, bulk validation, history matching, rollups) would
+# otherwise block the event loop.
 
 @router.get("/{work_id}/unmapped-entries", response_model=List[UnmappedEntryOut])
-def get_unmapped_entries(work_id: int, db: Session = Depends(get_db)):
+def get_unmapped_entries(
+    work_id: int,
+    response: Response,
+    after_id: int | None = None,
+    limit: int | None = Query(default=None, ge=1, le=10_000),
+    accept: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+    sessions: async_sessionmaker[AsyncSession] = Depends(get_async_sessionmaker),
+):
     """
-    Get a list of trial balance entries that need to be mapped.
+    Get a list of trial balance entries that need to be mapped, all of
+    them unless limit or after_id is given. Pages are keyed on entry id:
+    pass the X-Next-Cursor header back as after_id. With
+    `Accept: application/x-ndjson` all remaining rows are streamed
+    instead, ignoring limit.
     """
-    entries = mapping_service.list_unmapped_entries(db, work_id)
+    if wants_ndjson(accept):
+        return ndjson_response(mapping_service.unmapped_entries_stmt(work_id, after_id), _unmapped_entry_json, sessions)
+    limit = page_limit(after_id, limit)
+    entries = mapping_service.list_unmapped_entries(db, work_id, after_id, limit)
+    set_next_cursor(response, entries, limit, lambda e: e.id)
     return entries
 
 @router.post("/{work_id}/map-entry", status_code=201)
@@ -70,43 +115,180 @@ def map_entry(work_id: int, payload: MapEntryPayload, db: Session = Depends(get_
         return {"id": mapping.id, "trial_entry_id": mapping.trial_balance_entry_id, "sub_head_id": mapping.account_sub_head_id}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/{work_id}/mapped-entries/{entry_id}", status_code=204)
+def unmap_entry(work_id: int, entry_id: int, db: Session = Depends(get_db)):
+    """
+    Remove an entry's mapping so it can be mapped again.
+    """
+    if not mapping_service.unmap_entries(db, work_id, [entry_id]):
+        raise HTTPException(status_code=404, detail="Mapped entry not found")
+    return Response(status_code=204)
+
+@router.post("/{work_id}/auto-map", response_model=AutoMapResult)
+def auto_map(work_id: int, db: Session = Depends(get_db)):
+    """
+    Carry mappings forward from the company's earlier works by account name.
+    """
+    try:
+        return mapping_service.auto_map_from_history(db, work_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/{work_id}/map-entries", response_model=BulkMapResult)
+def map_entries(work_id: int, payload: BulkMapPayload, db: Session = Depends(get_db)):
+    """
+    Map many trial balance entries in one call. Returns per-item errors;
+    with atomic=true (the default) nothing is saved unless all items are valid.
+    """
+    try:
+        return mapping_service.create_mappings_bulk(db, work_id, payload.items, payload.atomic)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     
+def _statement_data(db: Session, work_id: int, account_ids, prior_periods: int):
+    if not prior_periods:
+        return statement_generation_service.get_statement_data(db, work_id, account_ids)
+    data = statement_generation_service.get_comparative_data(db, work_id, prior_periods, account_ids)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Work not found")
+    return data
+
+def _statement_inputs(db: Session, work_id: int, template_id: int, prior_periods: int):
+    # (template, labels, data) for one statement; called in the threadpool.
+    template = db.get(ReportTemplate, template_id)
+    if not template:
+        raise HTTPException(status_code=404, detail="Report template not found")
+    try:
+        plan = get_render_plan(template)
+    except TemplateDefinitionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # Only the accounts the template references, labelled from the chart snapshot.
+    data = _statement_data(db, work_id, plan.account_ids, prior_periods)
+    return template, get_chart_snapshot(db).labels(plan.account_ids), data
+
 @router.get("/{work_id}/statements/{template_id}")
-def generate_statement(
+async def generate_statement(
     work_id: int,
     template_id: int,
     format: Literal["pdf", "xlsx"] = "pdf",
+    prior_periods: int = Query(default=0, ge=0, le=4),
+    if_none_match: str | None = Header(default=None),
     db: Session = Depends(get_db)
 ):
     """
     Generate a financial statement for a work using a template.
+    `prior_periods` adds comparative columns for up to that many earlier
+    works of the same company (e.g. 4 for a five-year trend).
+    Rendered files are cached by content address and served with a strong
+    ETag; a matching If-None-Match returns 304 without rendering.
     """
-    # 1. Get the Report Template
-    template = db.get(ReportTemplate, template_id)
-    if not template:
-        raise HTTPException(status_code=404, detail="Report template not found")
+    template, labels, calculated_data = await run_in_threadpool(
+        _statement_inputs, db, work_id, template_id, prior_periods
+    )
+    # Render (or serve the cached artifact) based on format
+    return await statement_response(template, labels, calculated_data, format, if_none_match)
 
-    # 2. Get the Calculated Data
-    calculated_data = statement_generation_service.calculate_statement_data(db, work_id)
-    
-    # 3. Get all accounts (for labels)
-    accounts = db.scalars(select(Account)).all()
-    account_map = {acc.id: acc for acc in accounts} # Simple lookup map
-
-    # 4. Render based on format
-    if format == "pdf":
-        content = report_rendering_service.render_pdf(template, account_map, calculated_data)
-        media_type = "application/pdf"
-        filename = f"{template.name}.pdf"
-    
-    elif format == "xlsx":
-        content = report_rendering_service.render_excel(template, account_map, calculated_data)
-        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        filename = f"{template.name}.xlsx"
 
+@router.get("/{work_id}/statement-workbook")
+def generate_statement_workbook(
+    work_id: int,
+    template_id: List[int] = Query(min_length=1, max_length=20),
+    prior_periods: int = Query(default=0, ge=0, le=4),
+    db: Session = Depends(get_db)
+):
+    """
+    Export several statements (e.g. balance sheet, P&L, schedules) as the
+    sheets of one .xlsx workbook, in the order of the template_id params.
+    The workbook is written in openpyxl's streaming write-only mode.
+    """
+    templates = {t.id: t for t in db.scalars(
+        select(ReportTemplate).where(ReportTemplate.id.in_(template_id))
+    ).all()}
+    missing = [t for t in template_id if t not in templates]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Report templates not found: {missing}")
+
+    chart = get_chart_snapshot(db)
+    sheets = []
+    for tid in template_id:
+        template = templates[tid]
+        try:
+            plan = get_render_plan(template)
+        except TemplateDefinitionError as e:
+            raise HTTPException(status_code=422, detail=f"Template {tid}: {e}")
+        data = _statement_data(db, work_id, plan.account_ids, prior_periods)
+        sheets.append((template, chart.labels(plan.account_ids), data))
+
+    with span("render"):
+        content = report_rendering_service.render_excel_workbook(sheets)
     return Response(
         content=content,
-        media_type=media_type,
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
\ No newline at end of file
+        media_type=render_job_service.MEDIA_TYPES["xlsx"],
+        headers={"Content-Disposition": f"attachment; filename=statements-{work_id}.xlsx"}
+    )
+
+
+@router.post("/statement-batch")
+def export_statement_batch(
+    payload: StatementBatchRequest,
+    db: Session = Depends(get_db),
+    sessions: sessionmaker[Session] = Depends(get_sessionmaker),
+):
+    """
+    Render every template for every work as one ZIP (work-<id>/<template
+    id>-<name>.<format> per file). Aggregates are computed in bulk per
+    chunk of works, renders run in parallel on the render process pool,
+    and each file is streamed as soon as it is ready. Failed renders are
+    listed in errors.txt at the end of the archive.
+    """
+    work_ids = list(dict.fromkeys(payload.work_ids))
+    found = set(db.scalars(select(FinancialWork.id).where(FinancialWork.id.in_(work_ids))).all())
+    missing = [w for w in work_ids if w not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Works not found: {missing}")
+
+    template_ids = list(dict.fromkeys(payload.template_ids))
+    templates = {t.id: t for t in db.scalars(
+        select(ReportTemplate).where(ReportTemplate.id.in_(template_ids))
+    ).all()}
+    missing = [t for t in template_ids if t not in templates]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Report templates not found: {missing}")
+
+    chart = get_chart_snapshot(db)
+    batch = []
+    for tid in template_ids:
+        try:
+            plan = get_render_plan(templates[tid])
+        except TemplateDefinitionError as e:
+            raise HTTPException(status_code=422, detail=f"Template {tid}: {e}")
+        batch.append(batch_export_service.BatchTemplate(
+            templates[tid], plan.account_ids, chart.labels(plan.account_ids)
+        ))
+
+    return zip_response(
+        batch_export_service.batch_statement_files(work_ids, batch, payload.format, sessions),
+        filename="statements.zip",
+    )
+
+
+@router.post("/{work_id}/statements/{template_id}/jobs", response_model=RenderJobOut, status_code=202)
+def submit_statement_job(
+    work_id: int,
+    template_id: int,
+    format: Literal["pdf", "xlsx"] = "pdf",
+    prior_periods: int = Query(default=0, ge=0, le=4),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a statement render on the background process pool.
+    Poll GET /render-jobs/{job_id} and download from /render-jobs/{job_id}/artifact.
+    """
+    template, labels, calculated_data = _statement_inputs(db, work_id, template_id, prior_periods)
+    try:
+        job = render_job_service.submit_render(work_id, template, labels, calculated_data, format)
+    except RenderQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job_out(job)
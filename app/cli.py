@@ -0,0 +1,38 @@
+"""
+Maintenance commands.
+
+    python -m app.cli balances verify [--work ID]   # report drift, exit 1 if any
+    python -m app.cli balances rebuild [--work ID]  # recompute from the ledger
+"""
+import argparse
+import sys
+from .core.dependencies import SessionLocal
+from .services.balance_service import rebuild_sub_head_balances, verify_sub_head_balances
+
+def _balances(args) -> int:
+    with SessionLocal() as db:
+        if args.action == "rebuild":
+            rows = rebuild_sub_head_balances(db, args.work)
+            print(f"rebuilt {rows} sub-head balance rows")
+            return 0
+        drift = verify_sub_head_balances(db, args.work)
+    for d in drift:
+        print(f"work {d['financial_work_id']} sub-head {d['account_sub_head_id']}: "
+              f"stored {d['stored']} ({d['stored_count']} entries), "
+              f"actual {d['actual']} ({d['actual_count']} entries)")
+    print(f"{len(drift)} drifted sub-head balances")
+    return 1 if drift else 0
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    balances = commands.add_parser("balances", help="verify or rebuild work_sub_head_balance")
+    balances.add_argument("action", choices=["verify", "rebuild"])
+    balances.add_argument("--work", type=int, help="limit to one work id")
+    balances.set_defaults(handler=_balances)
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
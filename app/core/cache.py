@@ -0,0 +1,77 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Any | None: ...
+    def set(self, key: str, value: Any) -> None: ...
+    def clear(self) -> None: ...
+
+class InProcessCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL. Each worker process
+    holds its own copy.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+class RedisCache:
+    """
+    Shared cache for multi-worker deployments. Values are pickled; Redis
+    handles eviction (configure maxmemory-policy allkeys-lru) and the TTL.
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float = 600, prefix: str = "smartfs:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("STATEMENT_CACHE_URL is set but the 'redis' package is not installed") from e
+        self._client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any | None:
+        raw = self._client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        self._client.set(self.prefix + key, pickle.dumps(value), ex=int(self.ttl_seconds))
+
+    def clear(self) -> None:
+        for key in self._client.scan_iter(self.prefix + "*"):
+            self._client.delete(key)
+
+def make_cache(url: str | None, max_entries: int, ttl_seconds: float) -> CacheBackend:
+    if url:
+        return RedisCache(url, ttl_seconds=ttl_seconds)
+    return InProcessCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -9,6 +10,40 @@ class Settings(BaseSettings):
     APP_PORT: int = 8000
 
     DATABASE_URL: str = Field(default="postgresql+psycopg://smartfs:smartfsstrongpass@db:5432/smartfs")
+    # Defaults to DATABASE_URL, which already works with psycopg's async mode.
+    ASYNC_DATABASE_URL: str | None = None
+    # Startup schema handling: "create_all" (dev/tests), "migrate" (alembic upgrade
+    # head) or "skip" (a separate migration job owns the schema). Unset means
+    # "skip" when APP_ENV=prod, so replicas start without touching the schema.
+    DB_INIT_MODE: Literal["create_all", "migrate", "skip"] | None = None
+
+    # Uploads are spooled to disk in chunks; None uses the system temp dir.
+    UPLOAD_MAX_BYTES: int = 512 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    UPLOAD_SPOOL_DIR: str | None = None
+    TB_PARSE_CHUNK_ROWS: int = 50_000
+    # Upload checks: "strict" rejects a failing file, "warn" stores it and reports, "off" skips.
+    TB_VALIDATION_MODE: Literal["strict", "warn", "off"] = "warn"
+    TB_VALIDATION_MAX_ISSUES: int = 1000
+    # "append" adds the file's lines; "replace" diffs them against the work's
+    # existing entries by account name. Re-sending the last file in the same mode is skipped.
+    TB_UPLOAD_MODE: Literal["append", "replace"] = "append"
+
+    # Statement aggregate cache; set a redis:// URL to share it across workers.
+    STATEMENT_CACHE_URL: str | None = None
+    STATEMENT_CACHE_MAX_ENTRIES: int = 256
+    STATEMENT_CACHE_TTL_SECONDS: int = 600
+
+    # Background statement rendering (process pool)
+    RENDER_MAX_WORKERS: int = 2
+    RENDER_QUEUE_LIMIT: int = 32
+    RENDER_JOB_TTL_SECONDS: int = 3600
+    # Works aggregated per query by the batch ZIP export.
+    STATEMENT_BATCH_CHUNK_WORKS: int = 100
+
+    # Rendered statement cache on disk; None uses <tmp>/smartfs-artifacts.
+    ARTIFACT_STORE_DIR: str | None = None
+    ARTIFACT_STORE_MAX_BYTES: int = 1024 * 1024 * 1024
 
     class Config:
         env_file = ".env"
@@ -1,11 +1,28 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from pathlib import Path
+from sqlalchemy import create_engine, select, make_url
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from .config import settings
-from ..models.domain import Base
+from .metrics import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
+from ..models.domain import Base, MappedLedgerEntry, WorkSubHeadBalance
+from ..services.balance_service import rebuild_sub_head_balances
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+def _pool_args(url: str, poolclass: type) -> dict:
+    # SQLite keeps its own pool defaults; everything else gets a timed QueuePool.
+    return {} if make_url(url).get_backend_name() == "sqlite" else {"poolclass": poolclass}
+
+engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, **_pool_args(settings.DATABASE_URL, TimedQueuePool))
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Async engine for endpoints running on the event loop. psycopg 3 URLs work
+# for both engines; other drivers need ASYNC_DATABASE_URL (e.g. sqlite+aiosqlite).
+_async_url = settings.ASYNC_DATABASE_URL or settings.DATABASE_URL
+async_engine = create_async_engine(_async_url, pool_pre_ping=True, **_pool_args(_async_url, TimedAsyncQueuePool))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
 def get_db():
     db = SessionLocal()
     try:
@@ -13,6 +30,42 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_sessionmaker() -> sessionmaker[Session]:
+    # Like get_async_sessionmaker, for sync work a streaming body runs in
+    # the threadpool.
+    return SessionLocal
+
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    # For streaming response bodies, which run after the request's own
+    # session is closed and open sessions of their own.
+    return AsyncSessionLocal
+
+def _run_migrations() -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    root = Path(__file__).resolve().parents[2]
+    cfg = Config(str(root / "alembic.ini"))
+    cfg.set_main_option("script_location", str(root / "migrations"))
+    cfg.attributes["configure_logger"] = False
+    with engine.begin() as conn:
+        cfg.attributes["connection"] = conn
+        command.upgrade(cfg, "head")
+
 def init_db():
-    # Simple auto-create; replace with Alembic for migrations in real deployments.
-    Base.metadata.create_all(bind=engine)
+    mode = settings.DB_INIT_MODE or ("skip" if settings.APP_ENV == "prod" else "create_all")
+    if mode == "skip":
+        return
+    if mode == "migrate":
+        _run_migrations()
+    else:
+        # Dev/test shortcut; deployments should use DB_INIT_MODE=migrate.
+        Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        # Backfill the per-work sub-head balances for data created before they existed.
+        if db.scalar(select(MappedLedgerEntry.id).limit(1)) and not db.scalar(select(WorkSubHeadBalance.financial_work_id).limit(1)):
+            rebuild_sub_head_balances(db)
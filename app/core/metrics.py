@@ -0,0 +1,198 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, TypeVar
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+T = TypeVar("T")
+
+_DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def expose(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for lv, value in sorted(self._values.items()):
+                out.append(f"{self.name}{_labels(self.labels, lv)} {value}")
+        return out
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=_DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def expose(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for lv, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else repr(float(bound))
+                    out.append(f"{self.name}_bucket{_labels(self.labels + ('le',), lv + (le,))} {cumulative}")
+                out.append(f"{self.name}_sum{_labels(self.labels, lv)} {series[-1]}")
+                out.append(f"{self.name}_count{_labels(self.labels, lv)} {cumulative}")
+        return out
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+STAGE_SECONDS = Histogram("smartfs_stage_seconds", "Time spent per hot-path stage.", ("stage",))
+STAGE_ROWS = Counter("smartfs_stage_rows_total", "Rows processed per hot-path stage.", ("stage",))
+HTTP_SECONDS = Histogram("smartfs_http_request_seconds", "HTTP request latency.", ("method", "status"))
+DB_QUERY_SECONDS = Histogram("smartfs_db_query_seconds", "SQL statement execution time.", ("engine",))
+DB_POOL_WAIT_SECONDS = Histogram("smartfs_db_pool_wait_seconds", "Time waiting for a pooled connection.", ("engine",))
+DB_POOL_CHECKOUTS = Counter("smartfs_db_pool_checkouts_total", "Pooled connection checkouts.", ("engine",))
+CACHE_LOOKUPS = Counter("smartfs_cache_lookups_total", "Cache lookups by cache and result.", ("cache", "result"))
+
+REGISTRY = (STAGE_SECONDS, STAGE_ROWS, HTTP_SECONDS, DB_QUERY_SECONDS, DB_POOL_WAIT_SECONDS, DB_POOL_CHECKOUTS, CACHE_LOOKUPS)
+
+def render_prometheus() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
+
+# Per-request stage durations (seconds) for the Server-Timing header.
+# The dict is shared by reference, so threadpool and run_sync work
+# started from the request adds to it as well.
+_timings: contextvars.ContextVar[dict[str, float] | None] = contextvars.ContextVar("smartfs_timings", default=None)
+
+def _record(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Times a block as `stage` in smartfs_stage_seconds and Server-Timing.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(stage, time.perf_counter() - start)
+
+def timed_iter(iterable: Iterable[T], stage: str) -> Iterator[T]:
+    """
+    Yields from `iterable`, charging only the time spent producing each
+    item (e.g. lazy parsing) to `stage`.
+    """
+    it = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(it)
+        except StopIteration:
+            _record(stage, time.perf_counter() - start)
+            return
+        _record(stage, time.perf_counter() - start)
+        yield item
+
+def count_rows(stage: str, rows: int) -> None:
+    STAGE_ROWS.inc(rows, stage)
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware: collects span timings for each HTTP request and
+    returns them in a Server-Timing header, plus request latency metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings: dict[str, float] = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                total = (time.perf_counter() - start) * 1000
+                entries = [f"{name};dur={secs * 1000:.1f}" for name, secs in timings.items()]
+                entries.append(f"app;dur={total:.1f}")
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", ", ".join(entries).encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+            HTTP_SECONDS.observe(time.perf_counter() - start, scope["method"], status)
+
+def _timed_pool(base: type, engine_name: str) -> type:
+    class TimedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start, engine_name)
+                DB_POOL_CHECKOUTS.inc(1, engine_name)
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+TimedQueuePool = _timed_pool(QueuePool, "sync")
+TimedAsyncQueuePool = _timed_pool(AsyncAdaptedQueuePool, "async")
+
+def instrument_engine(engine, engine_name: str) -> None:
+    """
+    Records every statement's duration into smartfs_db_query_seconds and
+    the request's "db" Server-Timing entry. Pass async_engine.sync_engine
+    for async engines.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("smartfs_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["smartfs_query_start"].pop()
+        DB_QUERY_SECONDS.observe(seconds, engine_name)
+        timings = _timings.get()
+        if timings is not None:
+            timings["db"] = timings.get("db", 0.0) + seconds
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("smartfs_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
@@ -1,7 +1,10 @@
 from fastapi import FastAPI
-from .api import companies, works, accounts
+from fastapi.responses import PlainTextResponse
+from .api import companies, works, accounts, render_jobs, consolidations
 from .core.config import settings
 from .core.dependencies import init_db
+from .core.metrics import ServerTimingMiddleware, render_prometheus
+from .services import render_job_service
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -9,15 +12,26 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc"
 )
+app.add_middleware(ServerTimingMiddleware)
 
 @app.on_event("startup")
 async def on_startup():
     init_db()
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    render_job_service.shutdown()
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 app.include_router(companies.router, prefix="/companies", tags=["Companies"])
 app.include_router(works.router, prefix="/works", tags=["Works"])
 app.include_router(accounts.router, prefix="/accounts", tags=["Accounts"])
+app.include_router(render_jobs.router, prefix="/render-jobs", tags=["Render Jobs"])
+app.include_router(consolidations.router, prefix="/consolidations", tags=["Consolidations"])
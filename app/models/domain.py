@@ -1,5 +1,5 @@
 from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column
-from sqlalchemy import String, Text, Enum, Integer, Date, ForeignKey, Numeric
+from sqlalchemy import String, Text, Enum, Integer, Date, ForeignKey, Numeric, Index, event, insert
 import enum
 
 Base = declarative_base()
@@ -61,10 +61,12 @@ class CapitalStructure(Base):
 class FinancialWork(Base):
     __tablename__ = "financial_work"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    company_id: Mapped[int] = mapped_column(ForeignKey("company.id"))
+    company_id: Mapped[int] = mapped_column(ForeignKey("company.id"), index=True)
     start_date: Mapped[str] = mapped_column(Date, nullable=False)
     end_date: Mapped[str] = mapped_column(Date, nullable=False)
     status: Mapped[WorkStatus] = mapped_column(Enum(WorkStatus), default=WorkStatus.PENDING)
+    # Bumped whenever entries or mappings change; keys the statement cache.
+    data_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     company: Mapped["Company"] = relationship(back_populates="works")
     trial_entries: Mapped[list["TrialBalanceEntry"]] = relationship(back_populates="work")
@@ -75,12 +77,30 @@ class Account(Base):
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     type: Mapped[AccountNodeType] = mapped_column(Enum(AccountNodeType), nullable=False)
     category_type: Mapped[CategoryType | None] = mapped_column(Enum(CategoryType), nullable=True)
-    parent_id: Mapped[int | None] = mapped_column(ForeignKey("account.id"), nullable=True)
+    parent_id: Mapped[int | None] = mapped_column(ForeignKey("account.id"), nullable=True, index=True)
 
     parent: Mapped["Account"] = relationship(remote_side=[id], backref="children")
 
+class ChartVersion(Base):
+    """
+    Single-row counter of chart of accounts changes, bumped in the same
+    transaction as every Account write. Each worker's chart snapshot is
+    checked against it, so a change made by another process is seen at once.
+    """
+    __tablename__ = "chart_version"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+# create_all seeds the row, as migration 0008 does.
+event.listen(
+    ChartVersion.__table__, "after_create",
+    lambda table, connection, **kw: connection.execute(insert(table).values(id=1, version=0)),
+)
+
 class TrialBalanceEntry(Base):
     __tablename__ = "trial_balance_entry"
+    # Every hot query filters on the work and pages/joins by id.
+    __table_args__ = (Index("ix_trial_balance_entry_work_id_id", "financial_work_id", "id"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     financial_work_id: Mapped[int] = mapped_column(ForeignKey("financial_work.id"))
     account_name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -95,11 +115,56 @@ class MappedLedgerEntry(Base):
     __tablename__ = "mapped_ledger_entry"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     trial_balance_entry_id: Mapped[int] = mapped_column(ForeignKey("trial_balance_entry.id"), unique=True)
-    account_sub_head_id: Mapped[int] = mapped_column(ForeignKey("account.id"))
+    account_sub_head_id: Mapped[int] = mapped_column(ForeignKey("account.id"), index=True)
 
     trial_entry: Mapped["TrialBalanceEntry"] = relationship(back_populates="mapped_entry")
     sub_head: Mapped["Account"] = relationship()
 
+class TrialBalanceUpload(Base):
+    """
+    One row per stored trial balance upload. The content hash lets a
+    re-sent identical file be skipped.
+    """
+    __tablename__ = "trial_balance_upload"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    financial_work_id: Mapped[int] = mapped_column(ForeignKey("financial_work.id"), index=True)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    mode: Mapped[str] = mapped_column(String(16), nullable=False)
+
+class WorkSubHeadBalance(Base):
+    """
+    Per-work running total of mapped closing balances for each sub-head.
+    Maintained by deltas in balance_service whenever mappings change.
+    """
+    __tablename__ = "work_sub_head_balance"
+    financial_work_id: Mapped[int] = mapped_column(ForeignKey("financial_work.id"), primary_key=True)
+    account_sub_head_id: Mapped[int] = mapped_column(ForeignKey("account.id"), primary_key=True)
+    balance: Mapped[float] = mapped_column(Numeric(18,2), nullable=False, default=0)
+    entry_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+class ConsolidationGroup(Base):
+    """
+    A named set of works (typically group companies for the same period)
+    whose statements are consolidated together.
+    """
+    __tablename__ = "consolidation_group"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    members: Mapped[list["ConsolidationMember"]] = relationship(
+        back_populates="group", order_by="ConsolidationMember.position", cascade="all, delete-orphan"
+    )
+
+class ConsolidationMember(Base):
+    __tablename__ = "consolidation_member"
+    group_id: Mapped[int] = mapped_column(ForeignKey("consolidation_group.id"), primary_key=True)
+    financial_work_id: Mapped[int] = mapped_column(ForeignKey("financial_work.id"), primary_key=True)
+    # Order of the per-entity columns.
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    group: Mapped["ConsolidationGroup"] = relationship(back_populates="members")
+    work: Mapped["FinancialWork"] = relationship()
+
 class StatementType(str, enum.Enum):
     BALANCE_SHEET = "BALANCE_SHEET"
     PROFIT_LOSS = "PROFIT_LOSS"
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class ConsolidationGroupCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=255)
+    # Entity column order of consolidated statements.
+    work_ids: List[int] = Field(min_length=1, max_length=500)
+
+class ConsolidationGroupOut(ConsolidationGroupCreate):
+    id: int
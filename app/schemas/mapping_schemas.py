@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
 
 class MapEntryPayload(BaseModel):
     trial_balance_entry_id: int
@@ -12,4 +13,24 @@ class UnmappedEntryOut(BaseModel):
     closing_balance: float
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BulkMapPayload(BaseModel):
+    items: List[MapEntryPayload] = Field(max_length=50_000)
+    # All-or-nothing by default; with atomic=False valid items are committed.
+    atomic: bool = True
+
+class MapItemError(BaseModel):
+    index: int
+    trial_balance_entry_id: int
+    detail: str
+
+class BulkMapResult(BaseModel):
+    created: int
+    errors: List[MapItemError]
+
+
+class AutoMapResult(BaseModel):
+    exact: int
+    normalized: int
+    remaining: int
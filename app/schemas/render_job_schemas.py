@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+class RenderJobOut(BaseModel):
+    id: str
+    work_id: int
+    template_id: int
+    format: str
+    status: str
+    error: Optional[str] = None
+
+class StatementBatchRequest(BaseModel):
+    work_ids: List[int] = Field(min_length=1, max_length=1000)
+    template_ids: List[int] = Field(min_length=1, max_length=20)
+    format: Literal["pdf", "xlsx"] = "pdf"
@@ -0,0 +1,63 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from ..models.domain import Account, AccountNodeType, CategoryType, FinancialWork
+from .chart_service import chart_version_bump, invalidate_chart
+
+def _is_ancestor(db: Session, account_id: int, of_id: int) -> bool:
+    # Walks up parent_id from `of_id` (itself included) in one recursive query.
+    chain = select(Account.id, Account.parent_id).where(Account.id == of_id).cte("chain", recursive=True)
+    chain = chain.union_all(select(Account.id, Account.parent_id).join(chain, Account.id == chain.c.parent_id))
+    return db.scalar(select(chain.c.id).where(chain.c.id == account_id).limit(1)) is not None
+
+def create_account(
+    db: Session,
+    name: str,
+    type: AccountNodeType,
+    category_type: CategoryType | None = None,
+    parent_id: int | None = None,
+) -> Account:
+    """
+    Creates an account node.
+    """
+    if type == AccountNodeType.CATEGORY and parent_id is not None:
+        raise ValueError("CATEGORY cannot have a parent")
+    if parent_id is not None and db.get(Account, parent_id) is None:
+        raise ValueError("Parent account not found.")
+
+    acc = Account(name=name, type=type, category_type=category_type, parent_id=parent_id)
+    db.add(acc)
+    db.execute(chart_version_bump())
+    db.commit()
+    invalidate_chart()
+    db.refresh(acc)
+    return acc
+
+def update_account(
+    db: Session,
+    account_id: int,
+    name: str | None = None,
+    parent_id: int | None = None,
+) -> Account:
+    """
+    Renames and/or re-parents an account. Moving a node moves its whole
+    subtree and invalidates every work's cached statements.
+    """
+    acc = db.get(Account, account_id)
+    if not acc:
+        raise ValueError("Account not found.")
+    if name is not None:
+        acc.name = name
+    if parent_id is not None and parent_id != acc.parent_id:
+        if acc.type == AccountNodeType.CATEGORY:
+            raise ValueError("CATEGORY cannot have a parent")
+        if db.get(Account, parent_id) is None:
+            raise ValueError("Parent account not found.")
+        if _is_ancestor(db, account_id, parent_id):
+            raise ValueError("An account cannot be moved under its own descendant.")
+        acc.parent_id = parent_id
+        db.execute(update(FinancialWork).values(data_version=FinancialWork.data_version + 1))
+    db.execute(chart_version_bump())
+    db.commit()
+    invalidate_chart()
+    db.refresh(acc)
+    return acc
@@ -0,0 +1,88 @@
+from decimal import Decimal
+from typing import Collection, Dict
+import numpy as np
+from sqlalchemy import BigInteger, cast, func
+from ..models.domain import AccountNodeType
+from .chart_service import ChartSnapshot
+
+# Amounts are aggregated as int64 minor units (paise/cents), which is exact
+# for Numeric(18, 2) and leaves ample headroom: 2**63 minor units is ~9e16.
+MINOR_PER_UNIT = 100
+
+def minor_units(column):
+    """
+    SQL expression converting a Numeric(18, 2) column to integer minor units.
+    """
+    return cast(func.round(column * MINOR_PER_UNIT), BigInteger)
+
+def to_decimal(minor: int) -> Decimal:
+    return Decimal(int(minor)).scaleb(-2)
+
+def positions(snapshot: ChartSnapshot, account_ids: np.ndarray) -> np.ndarray:
+    """
+    Chart positions of `account_ids`; raises KeyError for ids missing
+    from the snapshot.
+    """
+    ids = np.frombuffer(snapshot.ids, dtype=np.int64)
+    if not len(account_ids):
+        return np.zeros(0, dtype=np.int64)
+    if not len(ids) or account_ids.min() < 0:
+        raise KeyError("Accounts not in chart snapshot")
+    # Dense id -> position table: one gather instead of a binary search per row.
+    lookup = np.full(max(int(ids[-1]), int(account_ids.max())) + 1, -1, dtype=np.int64)
+    lookup[ids] = np.arange(len(ids), dtype=np.int64)
+    pos = lookup[account_ids]
+    if (pos < 0).any():
+        raise KeyError(f"Accounts not in chart snapshot: {account_ids[pos < 0][:10].tolist()}")
+    return pos
+
+def rollup(
+    snapshot: ChartSnapshot,
+    account_ids: np.ndarray,
+    minor: np.ndarray,
+    groups: np.ndarray | None = None,
+    n_groups: int = 1,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sums `minor` amounts per account and rolls the totals up to every
+    ancestor, level by level from the deepest, via snapshot.parent_idx.
+    `groups` (e.g. one per work) selects the output row of each amount.
+
+    Returns (totals, touched), both shaped (n_groups, len(snapshot)):
+    int64 totals per chart position, and whether any amount reached it.
+    """
+    pos = positions(snapshot, np.asarray(account_ids, dtype=np.int64))
+    rows = np.zeros(len(pos), dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+    totals = np.zeros((n_groups, len(snapshot)), dtype=np.int64)
+    touched = np.zeros((n_groups, len(snapshot)), dtype=bool)
+    # 1-D scatter-add on the flattened matrix; fancy 2-D add.at is ~5x slower.
+    flat = rows * len(snapshot) + pos
+    np.add.at(totals.reshape(-1), flat, np.asarray(minor, dtype=np.int64))
+    touched.reshape(-1)[flat] = True
+
+    parent_idx = np.frombuffer(snapshot.parent_idx, dtype=np.int64)
+    for level in reversed(snapshot.levels[1:]):
+        children = np.frombuffer(level, dtype=np.int64)
+        parents = parent_idx[children]
+        np.add.at(totals, (slice(None), parents), totals[:, children])
+        np.logical_or.at(touched, (slice(None), parents), touched[:, children])
+    return totals, touched
+
+def bucket_totals(
+    snapshot: ChartSnapshot,
+    totals: np.ndarray,
+    touched: np.ndarray,
+    account_ids: Collection[int] | None = None,
+) -> Dict[AccountNodeType, Dict[int, Decimal]]:
+    """
+    One row of rollup() output as exact Decimals, bucketed by node type
+    and limited to `account_ids` if given.
+    """
+    keep = np.flatnonzero(touched)
+    ids = np.frombuffer(snapshot.ids, dtype=np.int64)
+    if account_ids is not None:
+        keep = keep[np.isin(ids[keep], np.fromiter(account_ids, dtype=np.int64))]
+    buckets: Dict[AccountNodeType, Dict[int, Decimal]] = {t: {} for t in AccountNodeType}
+    for p, account_id, total in zip(keep.tolist(), ids[keep].tolist(), totals[keep].tolist()):
+        buckets[snapshot.types[p]][account_id] = to_decimal(total)
+    return buckets
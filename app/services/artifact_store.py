@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from ..core.config import settings
+from ..models.domain import ReportTemplate
+from .statement_generation_service import CalculatedData
+
+def artifact_key(
+    template: ReportTemplate, data: CalculatedData, fmt: str, labels: dict[int, str] | None = None
+) -> str:
+    """
+    Content address of a rendered statement: a SHA-256 over the output
+    format, the template, the account labels and the calculated data.
+    """
+    h = hashlib.sha256()
+    for part in (fmt, template.name, template.template_definition):
+        h.update(part.encode())
+        h.update(b"\0")
+    h.update(json.dumps([labels or {}, data], sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+_TMP_PREFIX = ".tmp-"
+
+class LocalArtifactStore:
+    """
+    Rendered artifacts on local disk, one file per key. Reads refresh the
+    file's mtime; writes evict least recently used files once the total
+    size exceeds `max_bytes`. Safe to share between worker processes.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._size: int | None = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _files(self) -> list[tuple[float, int, Path]]:
+        out = []
+        for path in self.root.glob("*/*"):
+            if path.name.startswith(_TMP_PREFIX):
+                # Another worker's write in progress; never evict or count it.
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            out.append((st.st_mtime, st.st_size, path))
+        return out
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            content = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=_TMP_PREFIX)
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._files())
+            else:
+                # Overwriting a key replaces its old file rather than adding one.
+                self._size += len(content) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+artifact_store = LocalArtifactStore(
+    settings.ARTIFACT_STORE_DIR or os.path.join(tempfile.gettempdir(), "smartfs-artifacts"),
+    max_bytes=settings.ARTIFACT_STORE_MAX_BYTES,
+)
@@ -0,0 +1,153 @@
+from decimal import Decimal
+from typing import Iterable, Mapping, TypedDict
+from sqlalchemy import Select, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from ..models.domain import FinancialWork, MappedLedgerEntry, TrialBalanceEntry, WorkSubHeadBalance
+
+# sub-head id -> (balance delta, entry count delta)
+BalanceDeltas = dict[int, tuple[Decimal, int]]
+
+class BalanceDrift(TypedDict):
+    financial_work_id: int
+    account_sub_head_id: int
+    stored: Decimal
+    actual: Decimal
+    stored_count: int
+    actual_count: int
+
+def balance_deltas(rows: Iterable[tuple[int, Decimal | None]], sign: int = 1) -> BalanceDeltas:
+    """
+    Sums (sub_head_id, closing_balance) pairs into deltas; sign=-1 for
+    entries leaving a sub-head.
+    """
+    deltas: BalanceDeltas = {}
+    for sub_head_id, amount in rows:
+        total, count = deltas.get(sub_head_id, (Decimal(0), 0))
+        deltas[sub_head_id] = (total + sign * Decimal(amount or 0), count + sign)
+    return deltas
+
+def merge_deltas(*parts: BalanceDeltas) -> BalanceDeltas:
+    merged: BalanceDeltas = {}
+    for part in parts:
+        for sub_head_id, (amount, count) in part.items():
+            total, n = merged.get(sub_head_id, (Decimal(0), 0))
+            merged[sub_head_id] = (total + amount, n + count)
+    return merged
+
+def apply_balance_deltas(db: Session, work_id: int, deltas: Mapping[int, tuple[Decimal, int]]) -> None:
+    """
+    Adds `deltas` to the work's sub-head balances with one upsert. Runs in
+    the caller's transaction; the caller commits together with the mapping
+    change that produced the deltas.
+    """
+    rows = [
+        {"financial_work_id": work_id, "account_sub_head_id": sub_head_id, "balance": amount, "entry_count": count}
+        for sub_head_id, (amount, count) in deltas.items()
+        if amount or count
+    ]
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        ins = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(WorkSubHeadBalance)
+        db.execute(ins.on_conflict_do_update(
+            index_elements=[WorkSubHeadBalance.financial_work_id, WorkSubHeadBalance.account_sub_head_id],
+            set_={
+                "balance": WorkSubHeadBalance.balance + ins.excluded.balance,
+                "entry_count": WorkSubHeadBalance.entry_count + ins.excluded.entry_count,
+            },
+        ), rows)
+    else:
+        for row in rows:
+            updated = db.execute(
+                update(WorkSubHeadBalance)
+                .where(WorkSubHeadBalance.financial_work_id == work_id)
+                .where(WorkSubHeadBalance.account_sub_head_id == row["account_sub_head_id"])
+                .values(balance=WorkSubHeadBalance.balance + row["balance"],
+                        entry_count=WorkSubHeadBalance.entry_count + row["entry_count"])
+            )
+            if updated.rowcount == 0:
+                db.execute(insert(WorkSubHeadBalance), row)
+
+    if any(row["entry_count"] < 0 for row in rows):
+        db.execute(
+            delete(WorkSubHeadBalance)
+            .where(WorkSubHeadBalance.financial_work_id == work_id)
+            .where(WorkSubHeadBalance.entry_count <= 0)
+        )
+
+def sub_head_totals_stmt(work_id: int | None = None, minor: bool = False) -> Select:
+    """
+    Recomputes (work, sub-head, balance, entry_count) from the ledger;
+    with minor=True the balance is an exact sum of integer minor units.
+    """
+    from .aggregation_engine import minor_units
+
+    amount = minor_units(TrialBalanceEntry.closing_balance) if minor else TrialBalanceEntry.closing_balance
+    stmt = (
+        select(
+            TrialBalanceEntry.financial_work_id,
+            MappedLedgerEntry.account_sub_head_id,
+            func.coalesce(func.sum(amount), 0).label("balance"),
+            func.count().label("entry_count"),
+        )
+        .join(TrialBalanceEntry, MappedLedgerEntry.trial_balance_entry_id == TrialBalanceEntry.id)
+        .group_by(TrialBalanceEntry.financial_work_id, MappedLedgerEntry.account_sub_head_id)
+    )
+    if work_id is not None:
+        stmt = stmt.where(TrialBalanceEntry.financial_work_id == work_id)
+    return stmt
+
+def rebuild_sub_head_balances(db: Session, work_id: int | None = None) -> int:
+    """
+    Replaces the stored balances of one work (or all works) with a full
+    recomputation and bumps the affected data_versions. Returns the number
+    of rows written.
+    """
+    clear = delete(WorkSubHeadBalance)
+    bump = update(FinancialWork).values(data_version=FinancialWork.data_version + 1)
+    if work_id is not None:
+        clear = clear.where(WorkSubHeadBalance.financial_work_id == work_id)
+        bump = bump.where(FinancialWork.id == work_id)
+    db.execute(clear)
+    inserted = db.execute(
+        insert(WorkSubHeadBalance).from_select(
+            ["financial_work_id", "account_sub_head_id", "balance", "entry_count"],
+            sub_head_totals_stmt(work_id),
+        )
+    ).rowcount
+    db.execute(bump)
+    db.commit()
+    return inserted
+
+def verify_sub_head_balances(db: Session, work_id: int | None = None) -> list[BalanceDrift]:
+    """
+    Compares the stored balances with a full recomputation and returns
+    every (work, sub-head) that differs. Both sides are compared as integer
+    minor units, so the check is exact. Read-only.
+    """
+    from .aggregation_engine import minor_units, to_decimal
+
+    stored_stmt = select(
+        WorkSubHeadBalance.financial_work_id,
+        WorkSubHeadBalance.account_sub_head_id,
+        minor_units(WorkSubHeadBalance.balance),
+        WorkSubHeadBalance.entry_count,
+    )
+    if work_id is not None:
+        stored_stmt = stored_stmt.where(WorkSubHeadBalance.financial_work_id == work_id)
+    stored = {(w, s): (b, n) for w, s, b, n in db.execute(stored_stmt)}
+    actual = {(w, s): (b, n) for w, s, b, n in db.execute(sub_head_totals_stmt(work_id, minor=True))}
+
+    drift: list[BalanceDrift] = []
+    for key in sorted(stored.keys() | actual.keys()):
+        have, want = stored.get(key, (0, 0)), actual.get(key, (0, 0))
+        if have != want:
+            drift.append({
+                "financial_work_id": key[0], "account_sub_head_id": key[1],
+                "stored": to_decimal(have[0]), "actual": to_decimal(want[0]),
+                "stored_count": have[1], "actual_count": want[1],
+            })
+    return drift
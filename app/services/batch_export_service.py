@@ -0,0 +1,56 @@
+import re
+from dataclasses import dataclass
+from typing import AsyncIterator, Sequence
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from ..core.config import settings
+from ..models.domain import ReportTemplate
+from .render_job_service import RenderTask, render_many
+from .statement_generation_service import calculate_statement_data_many
+
+_UNSAFE_NAME = re.compile(r"[^\w\-. ]+")
+
+@dataclass(frozen=True)
+class BatchTemplate:
+    template: ReportTemplate
+    account_ids: frozenset[int]
+    labels: dict[int, str]
+
+def member_name(work_id: int, template: ReportTemplate, fmt: str) -> str:
+    return f"work-{work_id}/{template.id}-{_UNSAFE_NAME.sub('_', template.name).strip() or 'statement'}.{fmt}"
+
+def _chunk_data(sessions: sessionmaker[Session], work_ids: Sequence[int], scopes: list) -> list:
+    with sessions() as db:
+        return calculate_statement_data_many(db, work_ids, scopes)
+
+async def _tasks(
+    work_ids: Sequence[int], templates: Sequence[BatchTemplate], fmt: str, sessions: sessionmaker[Session]
+) -> AsyncIterator[RenderTask]:
+    # Aggregates STATEMENT_BATCH_CHUNK_WORKS works per query as the
+    # renderers ask for more, in the threadpool on a session of its own:
+    # the request's session is closed before a streaming body is sent.
+    scopes = [t.account_ids for t in templates]
+    step = settings.STATEMENT_BATCH_CHUNK_WORKS
+    for start in range(0, len(work_ids), step):
+        chunk = work_ids[start:start + step]
+        data = await run_in_threadpool(_chunk_data, sessions, chunk, scopes)
+        for work_id, per_template in zip(chunk, data):
+            for t, calculated in zip(templates, per_template):
+                yield RenderTask(member_name(work_id, t.template, fmt), t.template, t.labels, calculated, fmt)
+
+async def batch_statement_files(
+    work_ids: Sequence[int], templates: Sequence[BatchTemplate], fmt: str, sessions: sessionmaker[Session]
+) -> AsyncIterator[tuple[str, bytes]]:
+    """
+    Every template rendered for every work, as (archive name, content) in
+    completion order, aggregated on sessions from `sessions`. Failed
+    renders are listed in a final errors.txt instead of aborting the stream.
+    """
+    errors: list[str] = []
+    async for task, result in render_many(_tasks(work_ids, templates, fmt, sessions)):
+        if isinstance(result, BaseException):
+            errors.append(f"{task.name}: {result}")
+        else:
+            yield task.name, result
+    if errors:
+        yield "errors.txt", ("\n".join(errors) + "\n").encode()
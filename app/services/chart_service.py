@@ -0,0 +1,110 @@
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Iterable
+from sqlalchemy import Update, select, update
+from sqlalchemy.orm import Session
+from ..core.metrics import span
+from ..models.domain import Account, AccountNodeType, ChartVersion
+
+@dataclass(frozen=True, slots=True)
+class ChartSnapshot:
+    """
+    Immutable, column-oriented copy of the chart of accounts.
+    Position i holds account ids[i] (ids are ascending); parent_idx[i] is
+    the position of its parent, or -1 for a root. levels[d] holds the
+    positions at depth d, for bottom-up rollups.
+    """
+    version: int
+    ids: array
+    names: tuple[str, ...]
+    types: tuple[AccountNodeType, ...]
+    parent_idx: array
+    index: dict[int, int]
+    levels: tuple[array, ...]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def name(self, account_id: int) -> str | None:
+        pos = self.index.get(account_id)
+        return self.names[pos] if pos is not None else None
+
+    def labels(self, account_ids: Iterable[int]) -> dict[int, str]:
+        return {a: self.names[self.index[a]] for a in account_ids if a in self.index}
+
+_lock = threading.Lock()
+_snapshot: ChartSnapshot | None = None
+
+def chart_version_bump() -> Update:
+    """
+    UPDATE statement that bumps the chart version. Execute it in the same
+    transaction as any Account write.
+    """
+    return update(ChartVersion).values(version=ChartVersion.version + 1)
+
+def _chart_version(db: Session) -> int:
+    return db.scalar(select(ChartVersion.version)) or 0
+
+def invalidate_chart() -> None:
+    """
+    Drops this process's snapshot. Account writes call it after commit;
+    other workers notice the change through the chart version.
+    """
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+def _levels(parent_idx: array) -> tuple[array, ...]:
+    # Parents may sort after their children (ids are not topological), so
+    # resolve depths by walking up to the nearest known ancestor.
+    depth = [-1] * len(parent_idx)
+    for pos in range(len(parent_idx)):
+        path = []
+        p = pos
+        while p != -1 and depth[p] == -1:
+            path.append(p)
+            p = parent_idx[p]
+        d = depth[p] if p != -1 else -1
+        for q in reversed(path):
+            d += 1
+            depth[q] = d
+    levels = [array("q") for _ in range(max(depth, default=-1) + 1)]
+    for pos, d in enumerate(depth):
+        levels[d].append(pos)
+    return tuple(levels)
+
+def load_chart_snapshot(db: Session, version: int = 0) -> ChartSnapshot:
+    rows = db.execute(
+        select(Account.id, Account.name, Account.type, Account.parent_id).order_by(Account.id)
+    ).all()
+    ids = array("q", (r[0] for r in rows))
+    index = {account_id: pos for pos, account_id in enumerate(ids)}
+    parent_idx = array("q", (index.get(r[3], -1) if r[3] is not None else -1 for r in rows))
+    return ChartSnapshot(
+        version=version,
+        ids=ids,
+        names=tuple(r[1] for r in rows),
+        types=tuple(r[2] for r in rows),
+        parent_idx=parent_idx,
+        index=index,
+        levels=_levels(parent_idx),
+    )
+
+def get_chart_snapshot(db: Session) -> ChartSnapshot:
+    """
+    Current snapshot, reloaded whenever the chart version in the database
+    has moved on, whichever process changed the chart.
+    """
+    global _snapshot
+    # Read the version before the rows: a concurrent write then at worst
+    # makes the next call reload again.
+    version = _chart_version(db)
+    snap = _snapshot
+    if snap is not None and snap.version == version:
+        return snap
+    with span("chart"):
+        snap = load_chart_snapshot(db, version)
+    with _lock:
+        _snapshot = snap
+    return snap
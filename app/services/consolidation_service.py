@@ -0,0 +1,46 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from ..models.domain import ConsolidationGroup, ConsolidationMember, FinancialWork
+from ..schemas.consolidation_schemas import ConsolidationGroupCreate, ConsolidationGroupOut
+
+def group_out(group: ConsolidationGroup) -> ConsolidationGroupOut:
+    return ConsolidationGroupOut(id=group.id, name=group.name, work_ids=[m.financial_work_id for m in group.members])
+
+def create_group(db: Session, payload: ConsolidationGroupCreate) -> ConsolidationGroupOut:
+    """
+    Creates a consolidation group of existing works that all end on the
+    same date.
+    """
+    if len(set(payload.work_ids)) != len(payload.work_ids):
+        raise ValueError("A work can appear only once in a group.")
+    works = {w.id: w for w in db.scalars(select(FinancialWork).where(FinancialWork.id.in_(payload.work_ids)))}
+    missing = [w for w in payload.work_ids if w not in works]
+    if missing:
+        raise ValueError(f"Works not found: {missing}")
+    if len({w.end_date for w in works.values()}) > 1:
+        raise ValueError("All works in a group must end on the same date.")
+
+    group = ConsolidationGroup(name=payload.name, members=[
+        ConsolidationMember(financial_work_id=work_id, position=i) for i, work_id in enumerate(payload.work_ids)
+    ])
+    db.add(group)
+    db.commit()
+    return group_out(group)
+
+def get_group(db: Session, group_id: int) -> ConsolidationGroupOut | None:
+    group = db.get(ConsolidationGroup, group_id)
+    return group_out(group) if group else None
+
+def group_works(db: Session, group_id: int) -> list[FinancialWork] | None:
+    """
+    The group's works in column order with their companies loaded, in two
+    queries regardless of group size. None if the group does not exist.
+    """
+    group = db.scalar(
+        select(ConsolidationGroup)
+        .where(ConsolidationGroup.id == group_id)
+        .options(selectinload(ConsolidationGroup.members)
+                 .joinedload(ConsolidationMember.work)
+                 .joinedload(FinancialWork.company))
+    )
+    return [m.work for m in group.members] if group else None
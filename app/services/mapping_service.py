@@ -1,25 +1,56 @@
 # Placeholder for Mapping service.
 # Implement create_mapping, list_unmapped, and validations here.
+import re
+from decimal import Decimal
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import select
-from ..models.domain import TrialBalanceEntry, MappedLedgerEntry, Account, AccountNodeType
-from ..schemas.mapping_schemas import MapEntryPayload, UnmappedEntryOut
+from sqlalchemy import select, insert, delete, Select
+from sqlalchemy.exc import IntegrityError
+from ..models.domain import TrialBalanceEntry, MappedLedgerEntry, Account, AccountNodeType, FinancialWork
+from ..schemas.mapping_schemas import (
+    MapEntryPayload,
+    UnmappedEntryOut,
+    BulkMapResult,
+    MapItemError,
+    AutoMapResult,
+)
+from .statement_generation_service import data_version_bump
+from .balance_service import apply_balance_deltas, balance_deltas
 
-def list_unmapped_entries(db: Session, work_id: int) -> list[UnmappedEntryOut]:
+def unmapped_entries_stmt(work_id: int, after_id: int | None = None) -> Select:
     """
-    Finds all TrialBalanceEntry records for a work_id that do not
-    have a corresponding entry in the MappedLedgerEntry table.
+    Column select of a work's unmapped TrialBalanceEntry rows in id order,
+    starting after the `after_id` keyset cursor.
     """
-    # Select trial balance entries
     stmt = (
-        select(TrialBalanceEntry)
+        select(
+            TrialBalanceEntry.id,
+            TrialBalanceEntry.account_name,
+            TrialBalanceEntry.debit,
+            TrialBalanceEntry.credit,
+            TrialBalanceEntry.closing_balance,
+        )
         .where(TrialBalanceEntry.financial_work_id == work_id)
         .where(~select(MappedLedgerEntry.id)
                .where(MappedLedgerEntry.trial_balance_entry_id == TrialBalanceEntry.id)
                .exists())
+        .order_by(TrialBalanceEntry.id)
     )
-    unmapped = db.scalars(stmt).all()
-    return [UnmappedEntryOut.model_from_attributes(entry) for entry in unmapped]
+    if after_id is not None:
+        stmt = stmt.where(TrialBalanceEntry.id > after_id)
+    return stmt
+
+def list_unmapped_entries(
+    db: Session, work_id: int, after_id: int | None = None, limit: int | None = None
+) -> list[UnmappedEntryOut]:
+    """
+    Finds TrialBalanceEntry records for a work_id that do not
+    have a corresponding entry in the MappedLedgerEntry table,
+    one keyset page at a time.
+    """
+    stmt = unmapped_entries_stmt(work_id, after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [UnmappedEntryOut.model_validate(row) for row in db.execute(stmt)]
 
 
 def create_mapping(db: Session, payload: MapEntryPayload) -> MappedLedgerEntry:
@@ -53,6 +84,183 @@ def create_mapping(db: Session, payload: MapEntryPayload) -> MappedLedgerEntry:
         account_sub_head_id=payload.account_sub_head_id
     )
     db.add(new_mapping)
+    apply_balance_deltas(db, trial_entry.financial_work_id,
+                         balance_deltas([(sub_head.id, trial_entry.closing_balance)]))
+    db.execute(data_version_bump(trial_entry.financial_work_id))
     db.commit()
     db.refresh(new_mapping)
-    return new_mapping
\ No newline at end of file
+    return new_mapping
+
+
+# Keeps IN (...) lists well below driver bind-parameter limits.
+_IN_CHUNK = 1000
+
+def _chunks(ids: list[int]):
+    for i in range(0, len(ids), _IN_CHUNK):
+        yield ids[i:i + _IN_CHUNK]
+
+def create_mappings_bulk(
+    db: Session, work_id: int, items: list[MapEntryPayload], atomic: bool = True
+) -> BulkMapResult:
+    """
+    Validates many (entry, sub-head) pairs with a handful of set-based
+    queries and inserts the valid ones in a single executemany.
+    Items are checked for the same rules as create_mapping, plus that the
+    entry belongs to `work_id` and appears only once in the request.
+    With atomic=True nothing is written if any item fails.
+    """
+    entry_ids = sorted({i.trial_balance_entry_id for i in items})
+    sub_head_ids = sorted({i.account_sub_head_id for i in items})
+
+    work_entries: dict[int, Decimal] = {}
+    already_mapped: set[int] = set()
+    for chunk in _chunks(entry_ids):
+        work_entries.update(db.execute(
+            select(TrialBalanceEntry.id, TrialBalanceEntry.closing_balance)
+            .where(TrialBalanceEntry.id.in_(chunk))
+            .where(TrialBalanceEntry.financial_work_id == work_id)
+        ).all())
+        already_mapped.update(db.scalars(
+            select(MappedLedgerEntry.trial_balance_entry_id)
+            .where(MappedLedgerEntry.trial_balance_entry_id.in_(chunk))
+        ))
+    account_types: dict[int, AccountNodeType] = {}
+    for chunk in _chunks(sub_head_ids):
+        account_types.update(db.execute(
+            select(Account.id, Account.type).where(Account.id.in_(chunk))
+        ).all())
+
+    errors: list[MapItemError] = []
+    rows: list[dict] = []
+    seen: set[int] = set()
+    for index, item in enumerate(items):
+        entry_id = item.trial_balance_entry_id
+        if entry_id not in work_entries:
+            detail = "Trial balance entry not found in this work."
+        elif entry_id in seen:
+            detail = "Trial balance entry appears more than once in the request."
+        elif item.account_sub_head_id not in account_types:
+            detail = "Account sub-head not found."
+        elif account_types[item.account_sub_head_id] != AccountNodeType.SUB_HEAD:
+            detail = "Mapping must be to an account of type SUB_HEAD."
+        elif entry_id in already_mapped:
+            detail = "This trial balance entry is already mapped."
+        else:
+            seen.add(entry_id)
+            rows.append({"trial_balance_entry_id": entry_id, "account_sub_head_id": item.account_sub_head_id})
+            continue
+        seen.add(entry_id)
+        errors.append(MapItemError(index=index, trial_balance_entry_id=entry_id, detail=detail))
+
+    if not rows or (atomic and errors):
+        return BulkMapResult(created=0, errors=errors)
+
+    try:
+        db.execute(insert(MappedLedgerEntry), rows)
+        apply_balance_deltas(db, work_id, balance_deltas(
+            (r["account_sub_head_id"], work_entries[r["trial_balance_entry_id"]]) for r in rows
+        ))
+        db.execute(data_version_bump(work_id))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("Some entries were mapped concurrently; retry the request.")
+    return BulkMapResult(created=len(rows), errors=errors)
+
+
+def unmap_entries(db: Session, work_id: int, entry_ids: list[int]) -> int:
+    """
+    Removes the mappings of the given entries of a work, so they can be
+    mapped again. Unknown or unmapped ids are ignored. Returns the number
+    of mappings removed.
+    """
+    removed: list[tuple[int, int, Decimal]] = []
+    for chunk in _chunks(sorted(set(entry_ids))):
+        removed.extend(db.execute(
+            select(MappedLedgerEntry.id, MappedLedgerEntry.account_sub_head_id, TrialBalanceEntry.closing_balance)
+            .join(TrialBalanceEntry, MappedLedgerEntry.trial_balance_entry_id == TrialBalanceEntry.id)
+            .where(TrialBalanceEntry.id.in_(chunk))
+            .where(TrialBalanceEntry.financial_work_id == work_id)
+        ).all())
+    if not removed:
+        return 0
+
+    for chunk in _chunks([r[0] for r in removed]):
+        db.execute(delete(MappedLedgerEntry).where(MappedLedgerEntry.id.in_(chunk)))
+    apply_balance_deltas(db, work_id, balance_deltas(((r[1], r[2]) for r in removed), sign=-1))
+    db.execute(data_version_bump(work_id))
+    db.commit()
+    return len(removed)
+
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+def normalize_account_name(name: str) -> str:
+    """
+    Folds case, punctuation and whitespace: "Bank  A/c - HDFC" -> "bank ac hdfc".
+    """
+    return " ".join(_PUNCTUATION.sub("", name.casefold()).split())
+
+def auto_map_from_history(db: Session, work_id: int) -> AutoMapResult:
+    """
+    Maps this work's unmapped entries using the same company's earlier
+    works. Names are matched exactly first, then after normalization;
+    the most recent prior mapping wins. Everything is inserted in one
+    executemany, leaving only unmatched names for list_unmapped_entries.
+    """
+    work = db.get(FinancialWork, work_id)
+    if not work:
+        raise ValueError("Work not found.")
+
+    # Build the name indexes, oldest work first so newer mappings overwrite.
+    history = (
+        select(TrialBalanceEntry.account_name, MappedLedgerEntry.account_sub_head_id)
+        .join(MappedLedgerEntry, MappedLedgerEntry.trial_balance_entry_id == TrialBalanceEntry.id)
+        .join(FinancialWork, TrialBalanceEntry.financial_work_id == FinancialWork.id)
+        .where(FinancialWork.company_id == work.company_id)
+        .where(FinancialWork.start_date < work.start_date)
+        .order_by(FinancialWork.end_date, TrialBalanceEntry.id)
+        .execution_options(yield_per=10_000)
+    )
+    exact_index: dict[str, int] = {}
+    normalized_index: dict[str, int] = {}
+    for name, sub_head_id in db.execute(history):
+        exact_index[name] = sub_head_id
+        normalized_index[normalize_account_name(name)] = sub_head_id
+
+    unmapped = db.execute(
+        select(TrialBalanceEntry.id, TrialBalanceEntry.account_name, TrialBalanceEntry.closing_balance)
+        .where(TrialBalanceEntry.financial_work_id == work_id)
+        .where(~select(MappedLedgerEntry.id)
+               .where(MappedLedgerEntry.trial_balance_entry_id == TrialBalanceEntry.id)
+               .exists())
+    ).all()
+
+    matches: list[tuple[int, int, bool, Decimal]] = []
+    for entry_id, name, amount in unmapped:
+        if name in exact_index:
+            matches.append((entry_id, exact_index[name], True, amount))
+        else:
+            sub_head_id = normalized_index.get(normalize_account_name(name))
+            if sub_head_id is not None:
+                matches.append((entry_id, sub_head_id, False, amount))
+
+    # Drop targets that are no longer sub-heads in the current chart.
+    valid_sub_heads: set[int] = set()
+    for chunk in _chunks(sorted({m[1] for m in matches})):
+        valid_sub_heads.update(db.scalars(
+            select(Account.id).where(Account.id.in_(chunk)).where(Account.type == AccountNodeType.SUB_HEAD)
+        ))
+    matches = [m for m in matches if m[1] in valid_sub_heads]
+
+    if matches:
+        db.execute(insert(MappedLedgerEntry), [
+            {"trial_balance_entry_id": entry_id, "account_sub_head_id": sub_head_id}
+            for entry_id, sub_head_id, _, _ in matches
+        ])
+        apply_balance_deltas(db, work_id, balance_deltas((m[1], m[3]) for m in matches))
+        db.execute(data_version_bump(work_id))
+        db.commit()
+
+    exact = sum(1 for m in matches if m[2])
+    return AutoMapResult(exact=exact, normalized=len(matches) - exact, remaining=len(unmapped) - len(matches))
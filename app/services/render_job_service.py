@@ -0,0 +1,202 @@
+import asyncio
+import enum
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator
+from starlette.concurrency import run_in_threadpool
+from ..core.config import settings
+from ..core.metrics import CACHE_LOOKUPS
+from ..models.domain import ReportTemplate
+from .artifact_store import artifact_key, artifact_store
+from .statement_generation_service import CalculatedData
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+class RenderQueueFull(RuntimeError):
+    """Raised when RENDER_QUEUE_LIMIT jobs are already pending."""
+
+@dataclass
+class RenderJob:
+    id: str
+    work_id: int
+    template_id: int
+    format: str
+    filename: str
+    future: Future = field(repr=False)
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def status(self) -> JobStatus:
+        if not self.future.done():
+            return JobStatus.RUNNING if self.future.running() else JobStatus.QUEUED
+        # exception() raises CancelledError on a cancelled future (e.g. at shutdown).
+        if self.future.cancelled():
+            return JobStatus.CANCELLED
+        return JobStatus.FAILED if self.future.exception() else JobStatus.DONE
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.format]
+
+    def result(self) -> bytes:
+        return self.future.result()
+
+    def error(self) -> str | None:
+        if self.future.cancelled():
+            return "Render job was cancelled"
+        if self.future.done() and self.future.exception():
+            return str(self.future.exception())
+        return None
+
+_executor: ProcessPoolExecutor | None = None
+_jobs: dict[str, RenderJob] = {}
+_lock = threading.Lock()
+
+def _render(
+    template_id: int, template_name: str, template_definition: str,
+    labels: dict[int, str], data: CalculatedData, fmt: str,
+) -> bytes:
+    # Runs in a worker process; only plain data crosses the process boundary.
+    from . import report_rendering_service
+    template = ReportTemplate(id=template_id, name=template_name, template_definition=template_definition)
+    if fmt == "pdf":
+        return report_rendering_service.render_pdf(template, labels, data)
+    return report_rendering_service.render_excel(template, labels, data)
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: workers must not inherit the parent's DB connections or threads.
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.RENDER_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+def _purge_expired(now: float) -> None:
+    expired = [
+        job_id for job_id, job in _jobs.items()
+        if job.future.done() and job.finished_at and now - job.finished_at > settings.RENDER_JOB_TTL_SECONDS
+    ]
+    for job_id in expired:
+        del _jobs[job_id]
+
+def submit_render(
+    work_id: int, template: ReportTemplate, labels: dict[int, str], data: CalculatedData, fmt: str
+) -> RenderJob:
+    """
+    Queues a statement render on the process pool and returns immediately.
+    Jobs live in this worker's memory, so status polls must reach the same
+    process (use sticky routing or a single API worker per host).
+    """
+    with _lock:
+        now = time.time()
+        _purge_expired(now)
+        pending = sum(1 for job in _jobs.values() if not job.future.done())
+        if pending >= settings.RENDER_QUEUE_LIMIT:
+            raise RenderQueueFull("Too many render jobs are pending; retry later.")
+
+        future = _get_executor().submit(
+            _render, template.id, template.name, template.template_definition, labels, data, fmt
+        )
+        job = RenderJob(
+            id=uuid.uuid4().hex,
+            work_id=work_id,
+            template_id=template.id,
+            format=fmt,
+            filename=f"{template.name}.{fmt}",
+            future=future,
+        )
+        future.add_done_callback(lambda _: setattr(job, "finished_at", time.time()))
+        _jobs[job.id] = job
+        return job
+
+@dataclass(frozen=True)
+class RenderTask:
+    """One statement of a batch render; `name` identifies it to the caller."""
+    name: str
+    template: ReportTemplate
+    labels: dict[int, str]
+    data: CalculatedData
+    format: str
+
+async def render_many(
+    tasks: AsyncIterable[RenderTask], max_in_flight: int | None = None
+) -> AsyncIterator[tuple[RenderTask, bytes | BaseException]]:
+    """
+    Renders `tasks` on the process pool and yields (task, content) as each
+    finishes, or (task, exception) if it failed. Artifact cache hits are
+    yielded without rendering and new renders are stored. At most
+    `max_in_flight` renders (default twice RENDER_MAX_WORKERS) are pending,
+    and tasks are pulled only as slots free up, so memory stays flat
+    however many tasks there are.
+    """
+    limit = max_in_flight or 2 * settings.RENDER_MAX_WORKERS
+    pending: dict[asyncio.Future, tuple[RenderTask, str]] = {}
+
+    async def finished(wait_for_all: bool):
+        done, _ = await asyncio.wait(
+            pending, return_when=asyncio.ALL_COMPLETED if wait_for_all else asyncio.FIRST_COMPLETED
+        )
+        for future in done:
+            task, key = pending.pop(future)
+            # A render cancelled in the pool (e.g. at shutdown) has no exception to read.
+            error = RuntimeError("render was cancelled") if future.cancelled() else future.exception()
+            if error is not None:
+                logger.warning("Batch render of %s failed: %s", task.name, error)
+                yield task, error
+                continue
+            content = future.result()
+            await run_in_threadpool(artifact_store.put, key, content)
+            yield task, content
+
+    try:
+        async for task in tasks:
+            key = artifact_key(task.template, task.data, task.format, task.labels)
+            content = await run_in_threadpool(artifact_store.get, key)
+            CACHE_LOOKUPS.inc(1, "artifact", "miss" if content is None else "hit")
+            if content is not None:
+                yield task, content
+                continue
+            t = task.template
+            pending[asyncio.wrap_future(_get_executor().submit(
+                _render, t.id, t.name, t.template_definition, task.labels, task.data, task.format
+            ))] = (task, key)
+            if len(pending) >= limit:
+                async for result in finished(wait_for_all=False):
+                    yield result
+        if pending:
+            async for result in finished(wait_for_all=True):
+                yield result
+    finally:
+        # Client went away: don't leave queued renders behind.
+        for future in pending:
+            future.cancel()
+
+def get_job(job_id: str) -> RenderJob | None:
+    with _lock:
+        return _jobs.get(job_id)
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -1,12 +1,11 @@
-from ..models.domain import ReportTemplate, Account
+from ..models.domain import ReportTemplate
 from .statement_generation_service import CalculatedData
+from .template_plan_service import LineKind, get_render_plan
 from typing import List, Dict, Any
-from jinja2 import Environment, Template
-from weasyprint import HTML
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
+from typing import BinaryIO, Sequence, Tuple
+import functools
 import io
-import json
+import re
 
 # A basic Jinja2 template as described in the blueprint
 PDF_TEMPLATE_STR = """
@@ -19,33 +18,41 @@ PDF_TEMPLATE_STR = """
         .row { display: flex; justify-content: space-between; padding: 4px 0; }
         .label { text-indent: 20px; }
         .sub-head { text-indent: 40px; font-style: italic; }
-        .value { font-weight: bold; }
+        .value { font-weight: bold; min-width: 110px; text-align: right; }
+        .values { display: flex; }
+        .column-heads { font-weight: bold; border-bottom: 1px solid #333; }
         .total { font-weight: bold; border-top: 1px solid #000; padding-top: 5px; }
     </style>
 </head>
 <body>
     <div class="report-title">{{ report_name }}</div>
+    {% if headings %}
+        <div class="row column-heads">
+            <span></span>
+            <span class="values">{% for heading in headings %}<span class="value">{{ heading }}</span>{% endfor %}</span>
+        </div>
+    {% endif %}
     
-    {% for item in template_def %}
-        {% if item.type == 'section_title' %}
+    {% for item in lines %}
+        {% if item.kind == 'section_title' %}
             <div class="section-title">{{ item.label }}</div>
         
-        {% elif item.type == 'head' %}
+        {% elif item.kind == 'head' %}
             <div class="row">
-                <span class="label">{{ item.label }}</span>
-                <span class="value">{{ data.by_head.get(item.account_id, 0) | round(2) }}</span>
+                <span class="label">{{ item.label or labels.get(item.account_id, '') }}</span>
+                <span class="values">{% for col in columns %}<span class="value">{{ col[item.bucket].get(item.account_id, 0) | round(2) }}</span>{% endfor %}</span>
             </div>
             
-        {% elif item.type == 'sub_head' %}
+        {% elif item.kind == 'sub_head' %}
             <div class="row">
-                <span class="sub-head">{{ item.label }}</span>
-                <span class="value">{{ data.by_sub_head.get(item.account_id, 0) | round(2) }}</span>
+                <span class="sub-head">{{ item.label or labels.get(item.account_id, '') }}</span>
+                <span class="values">{% for col in columns %}<span class="value">{{ col[item.bucket].get(item.account_id, 0) | round(2) }}</span>{% endfor %}</span>
             </div>
 
-        {% elif item.type == 'total' %}
+        {% elif item.kind == 'total' %}
             <div class="row total">
-                <span class="label">{{ item.label }}</span>
-                <span class="value">{{ data.by_category.get(item.account_id, 0) | round(2) }}</span>
+                <span class="label">{{ item.label or labels.get(item.account_id, '') }}</span>
+                <span class="values">{% for col in columns %}<span class="value">{{ col[item.bucket].get(item.account_id, 0) | round(2) }}</span>{% endfor %}</span>
             </div>
         {% endif %}
     {% endfor %}
@@ -53,94 +60,131 @@ PDF_TEMPLATE_STR = """
 </html>
 """
 
-PDF_TEMPLATE = Environment().from_string(PDF_TEMPLATE_STR)
+# Jinja2, WeasyPrint and openpyxl are imported on first use, so workers that
+# never render (or only render one format) do not pay for loading them.
+@functools.cache
+def _pdf_template():
+    from jinja2 import Environment
+    return Environment().from_string(PDF_TEMPLATE_STR)
+
+def _columns(data: CalculatedData) -> tuple[List[Any], List[str]]:
+    """
+    Value columns and their headings: one per period for comparative
+    data, otherwise the data itself with no heading row.
+    """
+    if "columns" in data:
+        return data["columns"], [c["label"] for c in data["columns"]]
+    return [data], []
+
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+def _sheet_title(name: str, used: set[str]) -> str:
+    base = _INVALID_SHEET_CHARS.sub(" ", name).strip()[:31] or "Sheet"
+    title, n = base, 2
+    while title.lower() in used:
+        suffix = f" ({n})"
+        title, n = base[:31 - len(suffix)] + suffix, n + 1
+    used.add(title.lower())
+    return title
 
 def render_pdf(
     template: ReportTemplate,
-    accounts: Dict[int, Account],
+    labels: Dict[int, str],
     data: CalculatedData
 ) -> bytes:
     """
     Renders the calculated financial data into a PDF byte stream
-    using a report template.
+    using a report template's compiled plan. `labels` supplies account
+    names for lines without their own label. Comparative data gets one
+    value column per period.
     """
-    try:
-        template_def = json.loads(template.template_definition)
-    except json.JSONDecodeError:
-        template_def = [] # Or raise error
+    from weasyprint import HTML
+
+    plan = get_render_plan(template)
+    columns, headings = _columns(data)
 
     # Construct the context for Jinja2
     context = {
         "report_name": template.name,
-        "template_def": template_def,
-        "data": data,
-        "accounts": accounts
+        "lines": plan.lines,
+        "columns": columns,
+        "headings": headings,
+        "labels": labels
     }
     
-    html_string = PDF_TEMPLATE.render(context)
+    html_string = _pdf_template().render(context)
     
     pdf_bytes = HTML(string=html_string).write_pdf()
     return pdf_bytes
 
 def render_excel(
     template: ReportTemplate,
-    accounts: Dict[int, Account],
+    labels: Dict[int, str],
     data: CalculatedData
 ) -> bytes:
     """
     Renders the calculated financial data into an Excel .xlsx byte stream.
+    Values start in column D, one column per period for comparative data.
     """
-    try:
-        template_def = json.loads(template.template_definition)
-    except json.JSONDecodeError:
-        template_def = []
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
+
+    plan = get_render_plan(template)
+    columns, headings = _columns(data)
+    last_col = get_column_letter(3 + len(columns))
 
     wb = Workbook()
     ws = wb.active
-    ws.title = template.name[:30]
+    ws.title = _sheet_title(template.name, set())
 
     # Title
-    ws.merge_cells("A1:D1")
+    ws.merge_cells(f"A1:{last_col}1")
     title_cell = ws["A1"]
     title_cell.value = template.name
     title_cell.font = Font(bold=True, size=16)
     title_cell.alignment = Alignment(horizontal="center")
 
+    # Period headings
+    for offset, heading in enumerate(headings):
+        cell = ws.cell(row=2, column=4 + offset, value=heading)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal="right")
+
+    def write_values(row_idx: int, item, bold: bool = False, border: bool = False) -> None:
+        for offset, col in enumerate(columns):
+            cell = ws.cell(row=row_idx, column=4 + offset, value=col[item.bucket].get(item.account_id, 0))
+            cell.number_format = '#,##0.00'
+            if bold:
+                cell.font = Font(bold=True)
+            if border:
+                cell.border = Border(top=Side(style='thin'))
+
     row_idx = 3
     
-    for item in template_def:
-        label = item.get("label", "")
-        account_id = item.get("account_id")
+    for item in plan.lines:
+        label = item.label or labels.get(item.account_id, "")
         
-        if item['type'] == 'section_title':
-            ws.merge_cells(f"A{row_idx}:D{row_idx}")
+        if item.kind == LineKind.SECTION_TITLE:
+            ws.merge_cells(f"A{row_idx}:{last_col}{row_idx}")
             cell = ws[f"A{row_idx}"]
             cell.value = label
             cell.font = Font(bold=True, size=14)
             row_idx += 1
             
-        elif item['type'] == 'head':
+        elif item.kind == LineKind.HEAD:
             ws[f"B{row_idx}"] = label
-            cell = ws[f"D{row_idx}"]
-            cell.value = data["by_head"].get(account_id, 0)
-            cell.font = Font(bold=True)
-            cell.number_format = '#,##0.00'
+            write_values(row_idx, item, bold=True)
             row_idx += 1
             
-        elif item['type'] == 'sub_head':
+        elif item.kind == LineKind.SUB_HEAD:
             ws[f"C{row_idx}"] = label
-            cell = ws[f"D{row_idx}"]
-            cell.value = data["by_sub_head"].get(account_id, 0)
-            cell.number_format = '#,##0.00'
+            write_values(row_idx, item)
             row_idx += 1
 
-        elif item['type'] == 'total':
+        elif item.kind == LineKind.TOTAL:
             ws[f"B{row_idx}"] = label
-            cell = ws[f"D{row_idx}"]
-            cell.value = data["by_category"].get(account_id, 0)
-            cell.font = Font(bold=True)
-            cell.number_format = '#,##0.00'
-            cell.border = Border(top=Side(style='thin'))
+            write_values(row_idx, item, bold=True, border=True)
             row_idx += 1
             
         row_idx += 1 # Add a little space
@@ -149,4 +193,67 @@ def render_excel(
     stream = io.BytesIO()
     wb.save(stream)
     stream.seek(0)
-    return stream.getvalue()
\ No newline at end of file
+    return stream.getvalue()
+
+# (template, labels, data) for one sheet of a multi-statement workbook
+StatementSheet = Tuple[ReportTemplate, Dict[int, str], CalculatedData]
+
+def write_excel_workbook(sheets: Sequence[StatementSheet], stream: BinaryIO) -> None:
+    """
+    Writes several statements (e.g. balance sheet, P&L, schedules) as
+    sheets of one workbook in openpyxl write-only mode: rows are streamed
+    out as they are produced, so memory stays flat however many cells
+    there are. Layout follows render_excel, without merged title cells.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, Border, Side
+
+    wb = Workbook(write_only=True)
+    bold, title_font, section_font = Font(bold=True), Font(bold=True, size=16), Font(bold=True, size=14)
+    top_border = Border(top=Side(style='thin'))
+    used: set[str] = set()
+
+    def cell(ws, value, font=None, number_format=None, border=None, alignment=None):
+        c = WriteOnlyCell(ws, value=value)
+        if font is not None:
+            c.font = font
+        if number_format is not None:
+            c.number_format = number_format
+        if border is not None:
+            c.border = border
+        if alignment is not None:
+            c.alignment = alignment
+        return c
+
+    for template, labels, data in sheets:
+        plan = get_render_plan(template)
+        columns, headings = _columns(data)
+        ws = wb.create_sheet(_sheet_title(template.name, used))
+
+        ws.append([cell(ws, template.name, font=title_font)])
+        ws.append([None, None, None] + [
+            cell(ws, h, font=bold, alignment=Alignment(horizontal="right")) for h in headings
+        ])
+        for item in plan.lines:
+            label = item.label or labels.get(item.account_id, "")
+            if item.kind == LineKind.SECTION_TITLE:
+                ws.append([cell(ws, label, font=section_font)])
+            else:
+                strong = item.kind in (LineKind.HEAD, LineKind.TOTAL)
+                values = [
+                    cell(ws, col[item.bucket].get(item.account_id, 0), number_format='#,##0.00',
+                         font=bold if strong else None,
+                         border=top_border if item.kind == LineKind.TOTAL else None)
+                    for col in columns
+                ]
+                prefix = [None, None, label] if item.kind == LineKind.SUB_HEAD else [None, label, None]
+                ws.append(prefix + values)
+            ws.append([])  # Add a little space
+
+    wb.save(stream)
+
+def render_excel_workbook(sheets: Sequence[StatementSheet]) -> bytes:
+    stream = io.BytesIO()
+    write_excel_workbook(sheets, stream)
+    return stream.getvalue()
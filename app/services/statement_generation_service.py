@@ -1,89 +1,304 @@
 # Placeholder for Statement generation service.
 # Implement calculate_statement_data and aggregations over the Account hierarchy here.
-from sqlalchemy.orm import Session, aliased
-from sqlalchemy import select, func, and_
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, Update
+from ..core.cache import make_cache
+from ..core.config import settings
+from ..core.metrics import CACHE_LOOKUPS, span
 from ..models.domain import (
-    MappedLedgerEntry,
-    TrialBalanceEntry,
-    Account,
-    CategoryType
+    WorkSubHeadBalance,
+    AccountNodeType,
+    FinancialWork
 )
-from typing import Dict, TypedDict
+from .chart_service import get_chart_snapshot
+from typing import TYPE_CHECKING, Collection, Dict, List, NotRequired, Sequence, TypedDict
+import hashlib
+from itertools import chain
+
+if TYPE_CHECKING:
+    # NumPy (via aggregation_engine) is imported on first aggregation.
+    import numpy as np
+    from .chart_service import ChartSnapshot
+
+# Aggregates keyed by (work, data_version); a bump makes old entries unreachable.
+statement_cache = make_cache(
+    settings.STATEMENT_CACHE_URL,
+    max_entries=settings.STATEMENT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.STATEMENT_CACHE_TTL_SECONDS,
+)
+
+class ColumnData(TypedDict):
+    """
+    One period of a comparative statement (or one entity of a consolidated
+    one): the work it was computed for, its column heading and the same
+    buckets as CalculatedData. work_id is None for a consolidated total.
+    """
+    work_id: int | None
+    label: str
+    by_sub_head: Dict[int, Decimal]
+    by_head: Dict[int, Decimal]
+    by_category: Dict[int, Decimal]
 
 class CalculatedData(TypedDict):
     """
     A simple typed dictionary for the calculated data.
     The key is the Account ID, the value is the summed balance.
+    Comparative data also carries `columns`, one per period with the
+    current period first; the top-level buckets are that first column.
+    """
+    by_sub_head: Dict[int, Decimal]
+    by_head: Dict[int, Decimal]
+    by_category: Dict[int, Decimal]
+    columns: NotRequired[List[ColumnData]]
+
+def _load_balances(db: Session, work_ids: Sequence[int]) -> "np.ndarray":
+    # (work_id, sub_head_id, minor units) rows of the works' pre-summed
+    # SubHead balances, maintained by balance_service as mappings change.
+    import numpy as np
+    from .aggregation_engine import minor_units
+
+    stmt = select(
+        WorkSubHeadBalance.financial_work_id,
+        WorkSubHeadBalance.account_sub_head_id,
+        minor_units(WorkSubHeadBalance.balance),
+    )
+    if len(work_ids) == 1:
+        stmt = stmt.where(WorkSubHeadBalance.financial_work_id == work_ids[0])
+    else:
+        stmt = stmt.where(WorkSubHeadBalance.financial_work_id.in_(sorted(work_ids)))
+    # fromiter over the flattened rows: np.array() on Row objects probes
+    # each one for array interfaces, which dominates for large groups.
+    rows = db.execute(stmt).all()
+    return np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=3 * len(rows)).reshape(-1, 3)
+
+def _rollup_totals(db: Session, work_ids: Sequence[int]) -> tuple["ChartSnapshot", "np.ndarray", "np.ndarray"]:
+    """
+    rollup() of the works' sub-head balances: (chart, totals, touched)
+    with one row per work in `work_ids` order.
+    """
+    import numpy as np
+    from .aggregation_engine import rollup
+
+    rows = _load_balances(db, work_ids)
+    group = {work_id: i for i, work_id in enumerate(work_ids)}
+    groups = np.array([group[w] for w in rows[:, 0].tolist()], dtype=np.int64)
+    # Checked against the database's chart version after the balances are
+    # read, so the snapshot knows every sub-head they mention.
+    chart = get_chart_snapshot(db)
+    totals, touched = rollup(chart, rows[:, 1], rows[:, 2], groups, len(work_ids))
+    return chart, totals, touched
+
+def _rollup(db: Session, work_ids: Sequence[int], account_ids: Collection[int] | None) -> list[Dict[AccountNodeType, Dict[int, Decimal]]]:
     """
-    by_sub_head: Dict[int, float]
-    by_head: Dict[int, float]
-    by_category: Dict[int, float]
+    Exact per-work rollups of the works' sub-head balances up the chart,
+    one bucket dict per work in `work_ids` order.
+    """
+    from .aggregation_engine import bucket_totals
+
+    chart, totals, touched = _rollup_totals(db, work_ids)
+    return [bucket_totals(chart, totals[i], touched[i], account_ids) for i in range(len(work_ids))]
 
-def calculate_statement_data(db: Session, work_id: int) -> CalculatedData:
+def calculate_statement_data(
+    db: Session, work_id: int, account_ids: Collection[int] | None = None
+) -> CalculatedData:
     """
     Aggregates all mapped trial balance entries up the Account hierarchy
-    (Sub-Head -> Head -> Category) for a specific financial work.
-    """
-    
-    # Aliases for the account hierarchy
-    SubHead = aliased(Account)
-    Head = aliased(Account)
-    Category = aliased(Account)
-
-    # 1. Base query: Get the sum of closing_balance for each SubHead
-    # This joins MappedLedgerEntry -> TrialBalanceEntry -> Account (SubHead)
-    sub_head_totals_sq = (
-        select(
-            MappedLedgerEntry.account_sub_head_id,
-            func.sum(TrialBalanceEntry.closing_balance).label("sub_head_total")
-        )
-        .join(TrialBalanceEntry, MappedLedgerEntry.trial_balance_entry_id == TrialBalanceEntry.id)
-        .where(TrialBalanceEntry.financial_work_id == work_id)
-        .group_by(MappedLedgerEntry.account_sub_head_id)
-    ).subquery()
-
-    # 2. Main query: Join the SubHead totals up the hierarchy
-    # (SubHead Totals) -> SubHead -> Head -> Category
-    stmt = (
-        select(
-            # SubHead Info
-            SubHead.id.label("sub_head_id"),
-            sub_head_totals_sq.c.sub_head_total,
-            
-            # Head Info
-            Head.id.label("head_id"),
-            
-            # Category Info
-            Category.id.label("category_id"),
-            Category.category_type
-        )
-        .join(SubHead, sub_head_totals_sq.c.account_sub_head_id == SubHead.id)
-        .join(Head, SubHead.parent_id == Head.id)
-        .join(Category, Head.parent_id == Category.id)
-    )
+    for a specific financial work, to any depth. Every ancestor of a
+    mapped sub-head is rolled up from the work's work_sub_head_balance
+    rows with the NumPy engine (exact int64 minor units over the chart
+    snapshot's parent index) and bucketed by its node type as Decimals.
+    `account_ids` limits the output to the accounts a template references.
+    """
+    [buckets] = _rollup(db, [work_id], account_ids)
+    return {
+        "by_sub_head": buckets[AccountNodeType.SUB_HEAD],
+        "by_head": buckets[AccountNodeType.HEAD],
+        "by_category": buckets[AccountNodeType.CATEGORY]
+    }
 
-    results = db.execute(stmt).all()
-
-    # 3. Aggregate in Python
-    # This provides the flexibility described in the blueprint
-    by_sub_head: Dict[int, float] = {}
-    by_head: Dict[int, float] = {}
-    by_category: Dict[int, float] = {}
-
-    for row in results:
-        sh_id, total, h_id, c_id, c_type = row
-        
-        # Add to sub-head totals
-        by_sub_head[sh_id] = by_sub_head.get(sh_id, 0) + total
-        
-        # Add to head totals
-        by_head[h_id] = by_head.get(h_id, 0) + total
-        
-        # Add to category totals
-        by_category[c_id] = by_category.get(c_id, 0) + total
+def calculate_statement_data_many(
+    db: Session, work_ids: Sequence[int], scopes: Sequence[Collection[int] | None]
+) -> List[List[CalculatedData]]:
+    """
+    calculate_statement_data for every (work, account scope) pair from one
+    query over the works' sub-head balances and one rollup: result[i][j]
+    is work_ids[i] limited to scopes[j] (e.g. one scope per template).
+    """
+    from .aggregation_engine import bucket_totals
+
+    chart, totals, touched = _rollup_totals(db, work_ids)
+    out: List[List[CalculatedData]] = []
+    for i in range(len(work_ids)):
+        row: List[CalculatedData] = []
+        for scope in scopes:
+            buckets = bucket_totals(chart, totals[i], touched[i], scope)
+            row.append({
+                "by_sub_head": buckets[AccountNodeType.SUB_HEAD],
+                "by_head": buckets[AccountNodeType.HEAD],
+                "by_category": buckets[AccountNodeType.CATEGORY],
+            })
+        out.append(row)
+    return out
+
+def comparative_works(db: Session, work_id: int, prior_periods: int) -> List[FinancialWork]:
+    """
+    The work followed by up to `prior_periods` earlier works of the same
+    company, most recent first. Empty if the work does not exist.
+    """
+    work = db.get(FinancialWork, work_id)
+    if not work:
+        return []
+    prior = db.scalars(
+        select(FinancialWork)
+        .where(FinancialWork.company_id == work.company_id)
+        .where(FinancialWork.end_date < work.start_date)
+        .order_by(FinancialWork.end_date.desc())
+        .limit(prior_periods)
+    ).all() if prior_periods > 0 else []
+    return [work, *prior]
 
+def period_label(work: FinancialWork) -> str:
+    return work.end_date.strftime("%d %b %Y")
+
+def calculate_comparative_data(
+    db: Session, works: Sequence[FinancialWork], account_ids: Collection[int] | None = None
+) -> CalculatedData:
+    """
+    calculate_statement_data for several works from one query over their
+    sub-head balances, rolled up per work in a single pass. Columns follow
+    the order of `works`; the first work's buckets are also returned at
+    the top level.
+    """
+    per_work = _rollup(db, [w.id for w in works], account_ids)
+    columns: List[ColumnData] = [_column(w.id, period_label(w), buckets) for w, buckets in zip(works, per_work)]
+    first = columns[0]
+    return {
+        "by_sub_head": first["by_sub_head"],
+        "by_head": first["by_head"],
+        "by_category": first["by_category"],
+        "columns": columns,
+    }
+
+CONSOLIDATED_LABEL = "Consolidated"
+
+def entity_label(work: FinancialWork) -> str:
+    return work.company.legal_name
+
+def _column(work_id: int | None, label: str, buckets: Dict[AccountNodeType, Dict[int, Decimal]]) -> ColumnData:
     return {
-        "by_sub_head": by_sub_head,
-        "by_head": by_head,
-        "by_category": by_category
-    }
\ No newline at end of file
+        "work_id": work_id,
+        "label": label,
+        "by_sub_head": buckets[AccountNodeType.SUB_HEAD],
+        "by_head": buckets[AccountNodeType.HEAD],
+        "by_category": buckets[AccountNodeType.CATEGORY],
+    }
+
+def calculate_consolidated_data(
+    db: Session,
+    works: Sequence[FinancialWork],
+    account_ids: Collection[int] | None = None,
+    breakdown: bool = True,
+) -> CalculatedData:
+    """
+    Consolidated statement data for several works (e.g. the companies of
+    a group for one period): one query over their sub-head balances and
+    one rollup, summed across works in minor units. The top-level buckets
+    are the consolidated totals; with `breakdown`, `columns` holds the
+    consolidated column followed by one per work in `works` order.
+    """
+    from .aggregation_engine import bucket_totals
+
+    chart, totals, touched = _rollup_totals(db, [w.id for w in works])
+    combined = bucket_totals(chart, totals.sum(axis=0), touched.any(axis=0), account_ids)
+    data: CalculatedData = {
+        "by_sub_head": combined[AccountNodeType.SUB_HEAD],
+        "by_head": combined[AccountNodeType.HEAD],
+        "by_category": combined[AccountNodeType.CATEGORY],
+    }
+    if breakdown:
+        data["columns"] = [_column(None, CONSOLIDATED_LABEL, combined)] + [
+            _column(w.id, entity_label(w), bucket_totals(chart, totals[i], touched[i], account_ids))
+            for i, w in enumerate(works)
+        ]
+    return data
+
+def data_version_bump(work_id: int) -> Update:
+    """
+    UPDATE statement that bumps a work's data_version. Execute it in the same
+    transaction as any change to the work's entries or mappings.
+    """
+    return (
+        update(FinancialWork)
+        .where(FinancialWork.id == work_id)
+        .values(data_version=FinancialWork.data_version + 1)
+    )
+
+def _scope(account_ids: Collection[int] | None) -> str:
+    return "all" if account_ids is None else hashlib.sha1(
+        ",".join(map(str, sorted(account_ids))).encode()
+    ).hexdigest()
+
+def get_statement_data(
+    db: Session, work_id: int, account_ids: Collection[int] | None = None
+) -> CalculatedData:
+    """
+    Cached calculate_statement_data. Only the work's data_version is read
+    from the database on a hit.
+    """
+    version = db.scalar(select(FinancialWork.data_version).where(FinancialWork.id == work_id))
+    key = f"statement:{work_id}:{version}:{_scope(account_ids)}"
+    data = statement_cache.get(key)
+    if data is None:
+        CACHE_LOOKUPS.inc(1, "statement", "miss")
+        with span("aggregate"):
+            data = calculate_statement_data(db, work_id, account_ids)
+        statement_cache.set(key, data)
+    else:
+        CACHE_LOOKUPS.inc(1, "statement", "hit")
+    return data
+
+def get_comparative_data(
+    db: Session, work_id: int, prior_periods: int, account_ids: Collection[int] | None = None
+) -> CalculatedData | None:
+    """
+    Cached calculate_comparative_data for a work and up to `prior_periods`
+    earlier works of its company. The key covers every column's
+    data_version. Returns None if the work does not exist.
+    """
+    works = comparative_works(db, work_id, prior_periods)
+    if not works:
+        return None
+    versions = ",".join(f"{w.id}@{w.data_version}" for w in works)
+    key = f"comparative:{versions}:{_scope(account_ids)}"
+    data = statement_cache.get(key)
+    if data is None:
+        CACHE_LOOKUPS.inc(1, "statement", "miss")
+        with span("aggregate"):
+            data = calculate_comparative_data(db, works, account_ids)
+        statement_cache.set(key, data)
+    else:
+        CACHE_LOOKUPS.inc(1, "statement", "hit")
+    return data
+
+def get_consolidated_data(
+    db: Session,
+    works: Sequence[FinancialWork],
+    account_ids: Collection[int] | None = None,
+    breakdown: bool = True,
+) -> CalculatedData:
+    """
+    Cached calculate_consolidated_data. The key covers every member's
+    data_version, so a change to any entity recomputes the group.
+    """
+    versions = ",".join(f"{w.id}@{w.data_version}" for w in works)
+    key = f"consolidated:{versions}:{int(breakdown)}:{_scope(account_ids)}"
+    data = statement_cache.get(key)
+    if data is None:
+        CACHE_LOOKUPS.inc(1, "statement", "miss")
+        with span("aggregate"):
+            data = calculate_consolidated_data(db, works, account_ids, breakdown)
+        statement_cache.set(key, data)
+    else:
+        CACHE_LOOKUPS.inc(1, "statement", "hit")
+    return data
@@ -0,0 +1,95 @@
+import enum
+import hashlib
+import json
+from dataclasses import dataclass
+from ..core.cache import InProcessCache
+from ..models.domain import ReportTemplate
+
+class LineKind(str, enum.Enum):
+    SECTION_TITLE = "section_title"
+    HEAD = "head"
+    SUB_HEAD = "sub_head"
+    TOTAL = "total"
+
+# CalculatedData bucket each valued line kind reads from.
+_BUCKETS = {
+    LineKind.HEAD: "by_head",
+    LineKind.SUB_HEAD: "by_sub_head",
+    LineKind.TOTAL: "by_category",
+}
+
+class TemplateDefinitionError(ValueError):
+    """Raised when a ReportTemplate definition cannot be compiled."""
+
+@dataclass(frozen=True, slots=True)
+class PlanLine:
+    kind: LineKind
+    label: str
+    account_id: int | None = None
+    bucket: str | None = None
+
+@dataclass(frozen=True, slots=True)
+class RenderPlan:
+    """
+    Validated, render-ready form of a template definition.
+    `account_ids` is every account a line reads a value for.
+    """
+    template_id: int | None
+    definition_hash: str
+    lines: tuple[PlanLine, ...]
+    account_ids: frozenset[int]
+    kinds: frozenset[LineKind]
+
+def _compile_line(index: int, item) -> PlanLine:
+    if not isinstance(item, dict):
+        raise TemplateDefinitionError(f"Line {index}: expected an object.")
+    try:
+        kind = LineKind(item.get("type"))
+    except ValueError:
+        raise TemplateDefinitionError(f"Line {index}: unknown type {item.get('type')!r}.")
+    label = item.get("label", "")
+    if not isinstance(label, str):
+        raise TemplateDefinitionError(f"Line {index}: label must be a string.")
+    if kind == LineKind.SECTION_TITLE:
+        return PlanLine(kind=kind, label=label)
+    account_id = item.get("account_id")
+    if not isinstance(account_id, int) or isinstance(account_id, bool):
+        raise TemplateDefinitionError(f"Line {index}: {kind.value} requires an integer account_id.")
+    return PlanLine(kind=kind, label=label, account_id=account_id, bucket=_BUCKETS[kind])
+
+def compile_template(template_id: int | None, definition: str) -> RenderPlan:
+    """
+    Parses and validates a template definition (a JSON list of lines).
+    """
+    try:
+        items = json.loads(definition)
+    except json.JSONDecodeError as e:
+        raise TemplateDefinitionError(f"Template definition is not valid JSON: {e}")
+    if not isinstance(items, list):
+        raise TemplateDefinitionError("Template definition must be a JSON list.")
+
+    lines = tuple(_compile_line(i, item) for i, item in enumerate(items))
+    return RenderPlan(
+        template_id=template_id,
+        definition_hash=definition_hash(definition),
+        lines=lines,
+        account_ids=frozenset(l.account_id for l in lines if l.account_id is not None),
+        kinds=frozenset(l.kind for l in lines),
+    )
+
+def definition_hash(definition: str) -> str:
+    return hashlib.sha256(definition.encode()).hexdigest()
+
+# Plans never go stale: an edited definition hashes to a new key.
+_plans = InProcessCache(max_entries=512, ttl_seconds=float("inf"))
+
+def get_render_plan(template: ReportTemplate) -> RenderPlan:
+    """
+    Compiled plan for a template, cached by (template id, definition hash).
+    """
+    key = f"{template.id}:{definition_hash(template.template_definition)}"
+    plan = _plans.get(key)
+    if plan is None:
+        plan = compile_template(template.id, template.template_definition)
+        _plans.set(key, plan)
+    return plan
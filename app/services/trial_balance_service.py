@@ -1,31 +1,257 @@
+import csv
+import hashlib
+import logging
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, Literal, NotRequired, TypedDict
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import UploadFile
-from ..models.domain import FinancialWork, TrialBalanceEntry
-from ..utils.csv_parser import parse_trial_balance_csv
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from ..core.config import settings
+from ..core.metrics import count_rows, span, timed_iter
+from ..models.domain import FinancialWork, TrialBalanceEntry, TrialBalanceUpload
+from ..utils.uploads import spooled_upload
+from .statement_generation_service import data_version_bump
+from .trial_balance_validation import TrialBalanceInvalid, TrialBalanceValidator, ValidationMode, ValidationReport
 
-async def process_trial_balance_upload(db: Session, work_id: int, file: UploadFile) -> int:
+if TYPE_CHECKING:
+    import pandas as pd
+    from .trial_balance_diff import EntryDiff
+
+UploadMode = Literal["append", "replace"]
+
+logger = logging.getLogger(__name__)
+
+_COPY_SQL = (
+    "COPY trial_balance_entry "
+    "(financial_work_id, account_name, debit, credit, closing_balance) "
+    "FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (account_name))"
+)
+_COPY_COLUMNS = ["financial_work_id", "account_name", "debit", "credit", "closing_balance"]
+
+class IngestResult(TypedDict):
+    inserted: int
+    seconds: float
+    rows_per_sec: float
+    validation: NotRequired[ValidationReport]
+    # replace mode only
+    updated: NotRequired[int]
+    deleted: NotRequired[int]
+    unchanged: NotRequired[int]
+    sha256: NotRequired[str]
+    # True when the file matched the work's last upload and was skipped
+    duplicate: NotRequired[bool]
+
+def _uses_psycopg_copy(dialect) -> bool:
+    return dialect.name == "postgresql" and dialect.driver in ("psycopg", "psycopg_async")
+
+def _copy_payload(work_id: int, batch: "pd.DataFrame") -> bytes:
+    # Encodes a batch as CSV for COPY. This is the CPU-heavy step, so the
+    # async path runs it off the event loop together with parsing. Names are
+    # quoted: COPY reads an unquoted empty field as NULL, and a blank name
+    # must be stored as '' like on the executemany path.
+    with span("encode"):
+        return batch.assign(financial_work_id=work_id).to_csv(
+            columns=_COPY_COLUMNS, header=False, index=False, quoting=csv.QUOTE_NONNUMERIC
+        ).encode()
+
+def _insert_rows(work_id: int, batch: "pd.DataFrame") -> list[dict]:
+    with span("encode"):
+        return batch.assign(financial_work_id=work_id).to_dict("records")
+
+def _result(work_id: int, inserted: int, started: float) -> IngestResult:
+    seconds = time.perf_counter() - started
+    count_rows("ingest", inserted)
+    rows_per_sec = inserted / seconds if seconds > 0 else 0.0
+    logger.info("Ingested %d trial balance rows for work %d in %.3fs (%.0f rows/s)",
+                inserted, work_id, seconds, rows_per_sec)
+    return {"inserted": inserted, "seconds": round(seconds, 3), "rows_per_sec": round(rows_per_sec, 1)}
+
+def ingest_trial_balance(
+    db: Session,
+    work_id: int,
+    batches: Iterable["pd.DataFrame"],
+    before_commit: Callable[[], None] | None = None,
+) -> IngestResult:
+    """
+    Writes parsed trial balance batches for a work in a single transaction.
+    Uses COPY on psycopg/Postgres and batched executemany elsewhere.
+    Nothing is persisted if any batch fails or `before_commit` raises.
+    """
+    started = time.perf_counter()
+    inserted = 0
+    try:
+        if _uses_psycopg_copy(db.get_bind().dialect):
+            # COPY on the session's own connection, so it shares the transaction.
+            raw = db.connection().connection.driver_connection
+            with raw.cursor() as cur, cur.copy(_COPY_SQL) as copy:
+                for batch in batches:
+                    copy.write(_copy_payload(work_id, batch))
+                    inserted += len(batch)
+        else:
+            for batch in batches:
+                if not batch.empty:
+                    db.execute(insert(TrialBalanceEntry), _insert_rows(work_id, batch))
+                    inserted += len(batch)
+        if before_commit is not None:
+            before_commit()
+        db.execute(data_version_bump(work_id))
+        with span("commit"):
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return _result(work_id, inserted, started)
+
+async def ingest_trial_balance_async(
+    db: AsyncSession,
+    work_id: int,
+    batches: Iterable["pd.DataFrame"],
+    before_commit: Callable[[], None] | None = None,
+) -> IngestResult:
+    """
+    Async counterpart of ingest_trial_balance. Pulling from `batches` (i.e.
+    parsing) and encoding each batch happen in the threadpool; only the
+    driver I/O runs on the event loop.
+    """
+    started = time.perf_counter()
+    use_copy = _uses_psycopg_copy(db.bind.dialect)
+    encode = _copy_payload if use_copy else _insert_rows
+    payloads = iterate_in_threadpool((len(b), encode(work_id, b)) for b in batches if not b.empty)
+    inserted = 0
+    try:
+        if use_copy:
+            conn = await db.connection()
+            raw = (await conn.get_raw_connection()).driver_connection
+            async with raw.cursor() as cur, cur.copy(_COPY_SQL) as copy:
+                async for count, payload in payloads:
+                    await copy.write(payload)
+                    inserted += count
+        else:
+            async for count, rows in payloads:
+                await db.execute(insert(TrialBalanceEntry), rows)
+                inserted += count
+        if before_commit is not None:
+            before_commit()
+        await db.execute(data_version_bump(work_id))
+        with span("commit"):
+            await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return _result(work_id, inserted, started)
+
+def _diff_result(work_id: int, diff: "EntryDiff", started: float) -> IngestResult:
+    result = _result(work_id, len(diff.inserts), started)
+    result.update(updated=len(diff.updates), deleted=len(diff.deletes), unchanged=diff.unchanged)
+    return result
+
+def replace_trial_balance(
+    db: Session,
+    work_id: int,
+    batches: Iterable["pd.DataFrame"],
+    before_commit: Callable[[], None] | None = None,
+) -> IngestResult:
+    """
+    Makes the work's entries match `batches`, matching lines by account
+    name: only new, changed and removed lines are written, and unchanged
+    lines keep their mappings. Single transaction, like ingest_trial_balance.
+    """
+    from .trial_balance_diff import apply_entry_diff, diff_entries, existing_entries
+
+    started = time.perf_counter()
+    diff = diff_entries(existing_entries(db, work_id), batches)
+    apply_entry_diff(db, work_id, diff, before_commit)
+    return _diff_result(work_id, diff, started)
+
+async def replace_trial_balance_async(
+    db: AsyncSession,
+    work_id: int,
+    batches: Iterable["pd.DataFrame"],
+    before_commit: Callable[[], None] | None = None,
+) -> IngestResult:
+    """
+    Async counterpart of replace_trial_balance; parsing and diffing run in
+    the threadpool.
     """
-    Processes the uploaded trial balance CSV file, parses it,
+    from .trial_balance_diff import apply_entry_diff, diff_entries, existing_entries
+
+    started = time.perf_counter()
+    existing = await db.run_sync(existing_entries, work_id)
+    diff = await run_in_threadpool(diff_entries, existing, batches)
+    await db.run_sync(apply_entry_diff, work_id, diff, before_commit)
+    return _diff_result(work_id, diff, started)
+
+async def _is_repeat_upload(db: AsyncSession, work_id: int, sha256: str, mode: UploadMode) -> bool:
+    # Only the same file sent again in the same mode is a no-op: replacing
+    # with the file last appended still has differences to write.
+    last = (await db.execute(
+        select(TrialBalanceUpload.sha256, TrialBalanceUpload.mode)
+        .where(TrialBalanceUpload.financial_work_id == work_id)
+        .order_by(TrialBalanceUpload.id.desc())
+        .limit(1)
+    )).first()
+    return last is not None and tuple(last) == (sha256, mode)
+
+async def process_trial_balance_upload(
+    db: AsyncSession,
+    work_id: int,
+    file: UploadFile,
+    validation: ValidationMode | None = None,
+    mode: UploadMode | None = None,
+) -> IngestResult | None:
+    """
+    Spools the uploaded trial balance (CSV or XLSX, detected from the
+    content) to disk, parses it in chunks, validates each batch on the way
     and bulk-inserts the entries into the database.
+    `validation` (default TB_VALIDATION_MODE): "warn" adds the report to
+    the result, "strict" also raises TrialBalanceInvalid and stores
+    nothing if any check fails, "off" skips the checks.
+    `mode` (default TB_UPLOAD_MODE): "append" adds every line, "replace"
+    writes only the differences from the existing entries. A file whose
+    SHA-256 and mode match the work's last upload is not parsed or stored.
+    Returns None if the work does not exist; raises UploadTooLarge if the
+    file is bigger than UPLOAD_MAX_BYTES.
     """
-    work = db.get(FinancialWork, work_id)
+    # pandas/openpyxl load on the first upload, not at worker start.
+    from ..utils.xlsx_parser import iter_trial_balance_file_batches
+
+    work = await db.get(FinancialWork, work_id)
     if not work:
-        return -1  # Indicates work not found
-
-    content = await file.read()
-    rows = parse_trial_balance_csv(content)
-
-    entries = []
-    for r in rows:
-        entry = TrialBalanceEntry(
-            financial_work_id=work_id,
-            account_name=r["account_name"],
-            debit=r["debit"],
-            credit=r["credit"],
-            closing_balance=r["closing_balance"],
-        )
-        entries.append(entry)
+        return None
 
-    db.add_all(entries)
-    db.commit()
-    return len(entries)
\ No newline at end of file
+    validation = validation or settings.TB_VALIDATION_MODE
+    mode = mode or settings.TB_UPLOAD_MODE
+    validator = TrialBalanceValidator(settings.TB_VALIDATION_MAX_ISSUES) if validation != "off" else None
+    digest = hashlib.sha256()
+
+    def before_commit() -> None:
+        if validation == "strict":
+            report = validator.report()
+            if not report["ok"]:
+                raise TrialBalanceInvalid(report)
+        db.add(TrialBalanceUpload(financial_work_id=work_id, sha256=digest.hexdigest(), mode=mode))
+
+    async with spooled_upload(
+        file,
+        max_bytes=settings.UPLOAD_MAX_BYTES,
+        chunk_size=settings.UPLOAD_CHUNK_BYTES,
+        spool_dir=settings.UPLOAD_SPOOL_DIR,
+        digest=digest,
+    ) as spooled:
+        if await _is_repeat_upload(db, work_id, digest.hexdigest(), mode):
+            logger.info("Skipped trial balance upload for work %d: identical to the last one", work_id)
+            return {"inserted": 0, "seconds": 0.0, "rows_per_sec": 0.0,
+                    "sha256": digest.hexdigest(), "duplicate": True}
+        batches = timed_iter(
+            iter_trial_balance_file_batches(spooled, chunk_size=settings.TB_PARSE_CHUNK_ROWS), "parse"
+        )
+        if validator is not None:
+            batches = validator.validate(batches)
+        store = replace_trial_balance_async if mode == "replace" else ingest_trial_balance_async
+        result = await store(db, work_id, batches, before_commit=before_commit)
+    result.update(sha256=digest.hexdigest(), duplicate=False)
+    if validator is not None:
+        result["validation"] = validator.report()
+    return result
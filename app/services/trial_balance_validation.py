@@ -0,0 +1,141 @@
+from decimal import Decimal
+from typing import TYPE_CHECKING, Iterable, Iterator, Literal, TypedDict
+from ..core.metrics import span
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ValidationMode = Literal["strict", "warn", "off"]
+
+class ValidationIssue(TypedDict):
+    # 1-based data row (header and blank lines excluded); None for file-level issues
+    row: int | None
+    code: str
+    account_name: str | None
+    message: str
+
+class ValidationReport(TypedDict):
+    ok: bool
+    rows: int
+    total_debit: Decimal
+    total_credit: Decimal
+    counts: dict[str, int]
+    issues: list[ValidationIssue]
+    truncated: bool
+
+class TrialBalanceInvalid(ValueError):
+    """Raised in strict mode when an uploaded trial balance fails validation."""
+
+    def __init__(self, report: ValidationReport):
+        super().__init__("Trial balance failed validation.")
+        self.report = report
+
+_MESSAGES = {
+    "blank_name": "Account name is blank.",
+    "duplicate_name": "Account name appears more than once.",
+    "closing_mismatch": "Closing balance does not equal debit - credit.",
+}
+
+def _minor(col: "pd.Series"):
+    import numpy as np
+    return np.rint(col.to_numpy() * 100).astype(np.int64)
+
+class TrialBalanceValidator:
+    """
+    Checks parsed trial balance batches column-wise as they stream past:
+    blank and duplicate account names, closing balance vs debit - credit
+    (only when the file has its own closing column) and, at the end, that
+    total debits equal total credits. Amounts are compared as integer
+    minor units. Only the first `max_issues` issues are kept; `counts`
+    always covers every issue.
+    """
+
+    def __init__(self, max_issues: int = 1000):
+        import numpy as np
+
+        self.max_issues = max_issues
+        self.rows = 0
+        self.counts: dict[str, int] = {}
+        self.issues: list[ValidationIssue] = []
+        self._debit = 0
+        self._credit = 0
+        # Sorted 64-bit hashes of every name seen so far. Membership tests on
+        # hashes stay vectorized; a false duplicate needs a hash collision
+        # (~3e-8 odds at a million distinct names).
+        self._seen = np.zeros(0, dtype=np.uint64)
+
+    def validate(self, batches: Iterable["pd.DataFrame"]) -> Iterator["pd.DataFrame"]:
+        """
+        Passes `batches` through unchanged, checking each on the way.
+        """
+        for batch in batches:
+            with span("validate"):
+                self.check(batch)
+            yield batch
+
+    def check(self, batch: "pd.DataFrame") -> None:
+        import numpy as np
+        import pandas as pd
+
+        offset = self.rows + 1
+        self.rows += len(batch)
+        names = batch["account_name"]
+        debit, credit = _minor(batch["debit"]), _minor(batch["credit"])
+        self._debit += int(debit.sum())
+        self._credit += int(credit.sum())
+
+        blank = (names == "").to_numpy()
+        self._flag("blank_name", blank, names, offset)
+
+        # Later occurrences of a name, within this batch or after earlier ones.
+        hashes = pd.util.hash_array(names.to_numpy(dtype=object))
+        duplicate = names.duplicated().to_numpy()
+        if len(self._seen):
+            at = np.minimum(np.searchsorted(self._seen, hashes), len(self._seen) - 1)
+            duplicate |= self._seen[at] == hashes
+        duplicate &= ~blank
+        self._flag("duplicate_name", duplicate, names, offset)
+        # Stable sort (timsort) merges the two sorted runs in linear time.
+        fresh = np.sort(hashes[~blank])
+        self._seen = np.sort(np.concatenate([self._seen, fresh]), kind="stable")
+
+        if batch.attrs.get("has_closing"):
+            self._flag("closing_mismatch", (debit - credit) != _minor(batch["closing_balance"]), names, offset)
+
+    def _flag(self, code: str, mask, names: "pd.Series", offset: int) -> None:
+        import numpy as np
+
+        n = int(mask.sum())
+        if not n:
+            return
+        self.counts[code] = self.counts.get(code, 0) + n
+        room = self.max_issues - len(self.issues)
+        if room <= 0:
+            return
+        idx = np.flatnonzero(mask)[:room]
+        self.issues.extend(
+            {"row": offset + i, "code": code, "account_name": name, "message": _MESSAGES[code]}
+            for i, name in zip(idx.tolist(), names.to_numpy()[idx].tolist())
+        )
+
+    def report(self) -> ValidationReport:
+        counts = dict(self.counts)
+        issues = list(self.issues)
+        if self._debit != self._credit:
+            counts["unbalanced"] = 1
+            issues.insert(0, {
+                "row": None,
+                "code": "unbalanced",
+                "account_name": None,
+                "message": f"Total debit {Decimal(self._debit).scaleb(-2)} does not equal "
+                           f"total credit {Decimal(self._credit).scaleb(-2)}.",
+            })
+        return {
+            "ok": not counts,
+            "rows": self.rows,
+            "total_debit": Decimal(self._debit).scaleb(-2),
+            "total_credit": Decimal(self._credit).scaleb(-2),
+            "counts": counts,
+            "issues": issues,
+            "truncated": sum(counts.values()) > len(issues),
+        }
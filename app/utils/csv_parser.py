@@ -1,33 +1,67 @@
 import io
+from typing import BinaryIO, Iterator
 import pandas as pd
 
-def _to_number(x: str) -> float:
-    if x is None:
-        return 0.0
-    s = str(x).strip().replace(',', '').replace('"', '')
-    if s in ('', '-', '—'):
-        return 0.0
-    try:
-        return float(s)
-    except ValueError:
-        return 0.0
+# Rows per DataFrame chunk when streaming a trial balance.
+DEFAULT_CHUNK_ROWS = 50_000
 
-def parse_trial_balance_csv(content: bytes) -> list[dict]:
-    # Reads CSV bytes and returns a list of dicts with normalized fields
-    df = pd.read_csv(io.BytesIO(content), dtype=str, skip_blank_lines=True)
+# Normalized column order of every parsed batch.
+TB_COLUMNS = ["account_name", "debit", "credit", "closing_balance"]
+
+_BLANK_NUMBERS = ('', '-', '—')
+
+def _to_numbers(col: pd.Series | None, index: pd.Index) -> pd.Series:
+    # Column-wise equivalent of the old per-cell cleaner: strip commas/quotes,
+    # treat blank, "-" and "—" (and anything unparseable) as 0.0. Rounded to
+    # whole minor units so values stored as Numeric(18, 2) are exact.
+    if col is None:
+        return pd.Series(0.0, index=index, dtype="float64")
+    s = col.fillna('').astype(str).str.strip()
+    s = s.str.replace(',', '', regex=False).str.replace('"', '', regex=False)
+    s = s.mask(s.isin(_BLANK_NUMBERS), '0')
+    return pd.to_numeric(s, errors='coerce').fillna(0.0).astype("float64").round(2)
+
+def _resolve_columns(columns) -> tuple[str, str, str, str]:
     # Heuristic column name mapping
-    cols = {c.lower().strip(): c for c in df.columns}
-    name_col = cols.get('account') or cols.get('account_name') or list(df.columns)[0]
+    cols = {c.lower().strip(): c for c in columns}
+    name_col = cols.get('account') or cols.get('account_name') or list(columns)[0]
     debit_col = cols.get('debit') or 'Debit'
     credit_col = cols.get('credit') or 'Credit'
     closing_col = cols.get('closing_balance') or cols.get('balance') or credit_col
+    return name_col, debit_col, credit_col, closing_col
 
+def _normalize_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    name_col, debit_col, credit_col, closing_col = _resolve_columns(df.columns)
+    out = pd.DataFrame({
+        "account_name": df[name_col].fillna('').astype(str).str.strip(),
+        "debit": _to_numbers(df.get(debit_col), df.index),
+        "credit": _to_numbers(df.get(credit_col), df.index),
+        "closing_balance": _to_numbers(df.get(closing_col), df.index),
+    }, columns=TB_COLUMNS).reset_index(drop=True)
+    # False when closing_balance was borrowed from the credit column.
+    out.attrs["has_closing"] = closing_col != credit_col and closing_col in df.columns
+    return out
+
+def iter_trial_balance_batches(
+    source: bytes | str | BinaryIO,
+    chunk_size: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams a trial balance CSV in fixed-size chunks and yields normalized
+    DataFrames with the columns in TB_COLUMNS. Numbers are cleaned
+    column-wise, so no per-row Python work is done.
+    `source` may be raw bytes, a file path or a binary file object.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    reader = pd.read_csv(source, dtype=str, skip_blank_lines=True, chunksize=chunk_size)
+    with reader:
+        for chunk in reader:
+            yield _normalize_chunk(chunk)
+
+def parse_trial_balance_csv(content: bytes) -> list[dict]:
+    # Reads CSV bytes and returns a list of dicts with normalized fields
     out = []
-    for _, row in df.iterrows():
-        out.append({
-            "account_name": str(row.get(name_col, "")).strip(),
-            "debit": _to_number(row.get(debit_col)),
-            "credit": _to_number(row.get(credit_col)),
-            "closing_balance": _to_number(row.get(closing_col)),
-        })
+    for batch in iter_trial_balance_batches(content):
+        out.extend(batch.to_dict("records"))
     return out
@@ -0,0 +1,41 @@
+import hashlib
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from ..core.metrics import span
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+@asynccontextmanager
+async def spooled_upload(
+    file: UploadFile,
+    max_bytes: int,
+    chunk_size: int = 1024 * 1024,
+    spool_dir: str | None = None,
+    digest: "hashlib._Hash | None" = None,
+) -> AsyncIterator[BinaryIO]:
+    """
+    Copies an UploadFile to an anonymous temp file in fixed-size chunks and
+    yields it rewound to the start, so parsers can stream from disk instead
+    of holding the whole upload in memory. The file is removed on exit.
+    If given, `digest` (e.g. hashlib.sha256()) is fed every chunk.
+    Disk writes and hashing run in the threadpool, off the event loop.
+    """
+    with tempfile.TemporaryFile(dir=spool_dir) as spooled:
+        def append(chunk: bytes) -> None:
+            spooled.write(chunk)
+            if digest is not None:
+                digest.update(chunk)
+
+        size = 0
+        with span("spool"):
+            while chunk := await file.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit.")
+                await run_in_threadpool(append, chunk)
+        spooled.seek(0)
+        yield spooled
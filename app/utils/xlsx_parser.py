@@ -0,0 +1,63 @@
+import io
+from typing import BinaryIO, Iterator
+import pandas as pd
+from .csv_parser import DEFAULT_CHUNK_ROWS, _normalize_chunk, iter_trial_balance_batches
+
+# Every .xlsx file is a ZIP archive.
+_XLSX_MAGIC = b"PK\x03\x04"
+
+def detect_format(source: BinaryIO) -> str:
+    """
+    "xlsx" or "csv", judged by the file's leading bytes rather than its
+    name or content type. Leaves the file position unchanged.
+    """
+    start = source.tell()
+    head = source.read(len(_XLSX_MAGIC))
+    source.seek(start)
+    return "xlsx" if head == _XLSX_MAGIC else "csv"
+
+def iter_trial_balance_xlsx_batches(
+    source: bytes | str | BinaryIO,
+    chunk_size: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams the first worksheet of a trial balance workbook in read-only
+    mode and yields normalized DataFrames, exactly like
+    iter_trial_balance_batches does for CSV. The first row is the header;
+    fully empty rows are skipped.
+    """
+    from openpyxl import load_workbook
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c).strip() if c is not None else f"column_{i}" for i, c in enumerate(header)]
+        chunk: list[tuple] = []
+        for row in rows:
+            if all(v is None or v == "" for v in row):
+                continue
+            # Cells as text, like read_csv(dtype=str), so both formats share
+            # one number cleaner.
+            chunk.append(tuple(None if v is None else str(v) for v in row[:len(columns)]))
+            if len(chunk) >= chunk_size:
+                yield _normalize_chunk(pd.DataFrame(chunk, columns=columns, dtype=object))
+                chunk = []
+        if chunk:
+            yield _normalize_chunk(pd.DataFrame(chunk, columns=columns, dtype=object))
+    finally:
+        wb.close()
+
+def iter_trial_balance_file_batches(
+    source: BinaryIO, chunk_size: int = DEFAULT_CHUNK_ROWS
+) -> Iterator[pd.DataFrame]:
+    """
+    Normalized batches from a CSV or XLSX trial balance, auto-detected.
+    """
+    if detect_format(source) == "xlsx":
+        return iter_trial_balance_xlsx_batches(source, chunk_size)
+    return iter_trial_balance_batches(source, chunk_size)
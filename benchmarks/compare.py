@@ -0,0 +1,34 @@
+"""
+Compare two benchmark result files case by case.
+
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+import argparse
+import json
+
+def _index(report: dict) -> dict[tuple[int, str], float]:
+    return {
+        (run["rows"], r["case"]): r["seconds"]
+        for run in report["runs"]
+        for r in run["results"]
+        if "seconds" in r
+    }
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+    with open(args.baseline) as f:
+        old = _index(json.load(f))
+    with open(args.candidate) as f:
+        new = _index(json.load(f))
+
+    print(f"{'rows':>9} {'case':<22} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for key in sorted(old.keys() & new.keys()):
+        rows, case = key
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        print(f"{rows:>9} {case:<22} {old[key]:>10.3f} {new[key]:>10.3f} {change:>+7.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Deterministic synthetic data for benchmarks: a company, a multi-level
+chart of accounts, trial balance CSVs and mappings.
+"""
+import csv
+import datetime
+import io
+import json
+import random
+from dataclasses import dataclass
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from app.models.domain import (
+    Account,
+    AccountNodeType,
+    CategoryType,
+    Company,
+    FinancialWork,
+    MappedLedgerEntry,
+    ReportTemplate,
+    StatementType,
+    TrialBalanceEntry,
+)
+from app.services.chart_service import chart_version_bump
+from app.services.balance_service import rebuild_sub_head_balances
+
+@dataclass
+class Chart:
+    category_ids: list[int]
+    head_ids: list[int]
+    sub_head_ids: list[int]
+
+def create_company_and_work(db: Session, name: str = "Bench Co Pvt Ltd", year: int = 2024) -> FinancialWork:
+    company = Company(legal_name=name)
+    db.add(company)
+    db.flush()
+    work = FinancialWork(
+        company_id=company.id,
+        start_date=datetime.date(year, 4, 1),
+        end_date=datetime.date(year + 1, 3, 31),
+    )
+    db.add(work)
+    db.commit()
+    return work
+
+def create_chart(db: Session, heads_per_category: int = 4, depth: int = 2, fanout: int = 3) -> Chart:
+    """
+    One category per CategoryType, `heads_per_category` heads under each,
+    `depth` levels of nested heads and `fanout` children per node; the
+    deepest level are sub-heads.
+    """
+    categories = []
+    for ct in CategoryType:
+        categories.append(db.scalar(
+            insert(Account).values(name=ct.value.title(), type=AccountNodeType.CATEGORY, category_type=ct)
+            .returning(Account.id)
+        ))
+    heads: list[int] = []
+    level = []
+    for cat_id in categories:
+        for i in range(heads_per_category):
+            level.append(db.scalar(
+                insert(Account).values(name=f"Head {cat_id}.{i}", type=AccountNodeType.HEAD, parent_id=cat_id)
+                .returning(Account.id)
+            ))
+    heads.extend(level)
+    for d in range(depth - 1):
+        nxt = []
+        for parent in level:
+            for i in range(fanout):
+                nxt.append(db.scalar(
+                    insert(Account).values(name=f"Group {parent}.{i}", type=AccountNodeType.HEAD, parent_id=parent)
+                    .returning(Account.id)
+                ))
+        heads.extend(nxt)
+        level = nxt
+    sub_heads = []
+    for parent in level:
+        for i in range(fanout):
+            sub_heads.append(db.scalar(
+                insert(Account).values(name=f"Sub-head {parent}.{i}", type=AccountNodeType.SUB_HEAD, parent_id=parent)
+                .returning(Account.id)
+            ))
+    db.execute(chart_version_bump())
+    db.commit()
+    return Chart(category_ids=categories, head_ids=heads, sub_head_ids=sub_heads)
+
+def create_template(db: Session, chart: Chart) -> ReportTemplate:
+    lines = []
+    for cat_id in chart.category_ids:
+        lines.append({"type": "section_title", "label": f"Category {cat_id}"})
+        lines.extend({"type": "head", "account_id": h} for h in chart.head_ids[:20])
+        lines.extend({"type": "sub_head", "account_id": s} for s in chart.sub_head_ids[:20])
+        lines.append({"type": "total", "label": "Total", "account_id": cat_id})
+    template = ReportTemplate(
+        name="Bench Balance Sheet",
+        statement_type=StatementType.BALANCE_SHEET,
+        template_definition=json.dumps(lines),
+    )
+    db.add(template)
+    db.commit()
+    return template
+
+def trial_balance_csv(rows: int, seed: int = 42) -> bytes:
+    """
+    A trial balance with the quirks real exports have: thousands
+    separators, "-" for zero and a closing balance of debit - credit.
+    """
+    rng = random.Random(seed)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["Account", "Debit", "Credit", "Closing_Balance"])
+    for i in range(rows):
+        amount = rng.randint(1, 5_000_000_00) / 100
+        if rng.random() < 0.5:
+            debit, credit, closing = f"{amount:,.2f}", "-", f"{amount:.2f}"
+        else:
+            debit, credit, closing = "-", f"{amount:,.2f}", f"{-amount:.2f}"
+        writer.writerow([f"Ledger {i:07d}", debit, credit, closing])
+    return out.getvalue().encode()
+
+def map_entries(db: Session, work_id: int, chart: Chart, coverage: float, seed: int = 42) -> int:
+    """
+    Maps a `coverage` fraction of the work's entries to random sub-heads
+    and rebuilds the work's sub-head balances.
+    """
+    rng = random.Random(seed)
+    entry_ids = db.scalars(
+        select(TrialBalanceEntry.id).where(TrialBalanceEntry.financial_work_id == work_id)
+    ).all()
+    rows = [
+        {"trial_balance_entry_id": e, "account_sub_head_id": rng.choice(chart.sub_head_ids)}
+        for e in entry_ids if rng.random() < coverage
+    ]
+    for i in range(0, len(rows), 50_000):
+        db.execute(insert(MappedLedgerEntry), rows[i:i + 50_000])
+    db.commit()
+    rebuild_sub_head_balances(db, work_id)
+    return len(rows)
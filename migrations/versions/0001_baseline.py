@@ -0,0 +1,100 @@
+"""Baseline schema, as created by create_all before migrations existed
+
+Exactly the original schema, so databases created back then can be
+marked with `alembic stamp 0001_baseline` and upgraded from there.
+Later additions (e.g. financial_work.data_version) come in their own
+revisions.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+company_type = sa.Enum("PVT_LTD", "LLP", "PUBLIC_LTD", "OTHER", name="companytype")
+work_status = sa.Enum("PENDING", "IN_PROGRESS", "COMPLETED", name="workstatus")
+account_node_type = sa.Enum("CATEGORY", "HEAD", "SUB_HEAD", name="accountnodetype")
+category_type = sa.Enum("ASSET", "LIABILITY", "EQUITY", "INCOME", "EXPENSE", name="categorytype")
+statement_type = sa.Enum("BALANCE_SHEET", "PROFIT_LOSS", "CASH_FLOW", name="statementtype")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "company",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("legal_name", sa.String(255), nullable=False, unique=True),
+        sa.Column("cin", sa.String(64), nullable=True, unique=True),
+        sa.Column("registered_address", sa.Text, nullable=True),
+        sa.Column("company_type", company_type, nullable=True),
+        sa.Column("nature_of_business", sa.Text, nullable=True),
+    )
+    op.create_table(
+        "accounting_policy",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("company_id", sa.Integer, sa.ForeignKey("company.id"), nullable=False, unique=True),
+        sa.Column("depreciation_method", sa.String(128)),
+        sa.Column("inventory_valuation_method", sa.String(128)),
+        sa.Column("revenue_recognition_basis", sa.String(128)),
+    )
+    op.create_table(
+        "capital_structure",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("company_id", sa.Integer, sa.ForeignKey("company.id"), nullable=False, unique=True),
+        sa.Column("authorized_capital", sa.Numeric(18, 2)),
+        sa.Column("issued_capital", sa.Numeric(18, 2)),
+        sa.Column("paid_up_capital", sa.Numeric(18, 2)),
+    )
+    op.create_table(
+        "financial_work",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("company_id", sa.Integer, sa.ForeignKey("company.id"), nullable=False),
+        sa.Column("start_date", sa.Date, nullable=False),
+        sa.Column("end_date", sa.Date, nullable=False),
+        sa.Column("status", work_status, nullable=False),
+    )
+    op.create_table(
+        "account",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("type", account_node_type, nullable=False),
+        sa.Column("category_type", category_type, nullable=True),
+        sa.Column("parent_id", sa.Integer, sa.ForeignKey("account.id"), nullable=True),
+    )
+    op.create_table(
+        "trial_balance_entry",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("financial_work_id", sa.Integer, sa.ForeignKey("financial_work.id"), nullable=False),
+        sa.Column("account_name", sa.String(255), nullable=False),
+        sa.Column("debit", sa.Numeric(18, 2), nullable=False),
+        sa.Column("credit", sa.Numeric(18, 2), nullable=False),
+        sa.Column("closing_balance", sa.Numeric(18, 2), nullable=False),
+    )
+    op.create_table(
+        "mapped_ledger_entry",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("trial_balance_entry_id", sa.Integer, sa.ForeignKey("trial_balance_entry.id"), nullable=False, unique=True),
+        sa.Column("account_sub_head_id", sa.Integer, sa.ForeignKey("account.id"), nullable=False),
+    )
+    op.create_table(
+        "report_template",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("statement_type", statement_type, nullable=False),
+        sa.Column("template_definition", sa.Text, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    for table in (
+        "report_template", "mapped_ledger_entry", "trial_balance_entry", "account", "financial_work", "capital_structure", "accounting_policy", "company",
+    ):
+        op.drop_table(table)
+    bind = op.get_bind()
+    for enum in (statement_type, category_type, account_node_type, work_status, company_type):
+        enum.drop(bind, checkfirst=True)
@@ -0,0 +1,28 @@
+"""Indexes for the per-work hot paths
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002_hot_path_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Unmapped listing, ingest deletes and keyset pages: WHERE work = ? ORDER BY id.
+    op.create_index("ix_trial_balance_entry_work_id_id", "trial_balance_entry", ["financial_work_id", "id"])
+    # Sub-head aggregation and auto-map history joins.
+    op.create_index("ix_mapped_ledger_entry_account_sub_head_id", "mapped_ledger_entry", ["account_sub_head_id"])
+    op.create_index("ix_account_parent_id", "account", ["parent_id"])
+    op.create_index("ix_financial_work_company_id", "financial_work", ["company_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_financial_work_company_id", table_name="financial_work")
+    op.drop_index("ix_account_parent_id", table_name="account")
+    op.drop_index("ix_mapped_ledger_entry_account_sub_head_id", table_name="mapped_ledger_entry")
+    op.drop_index("ix_trial_balance_entry_work_id_id", table_name="trial_balance_entry")
@@ -0,0 +1,91 @@
+"""Optional hash partitioning of trial_balance_entry by work (PostgreSQL)
+
+Opt-in: run `alembic -x tb_partitions=16 upgrade head`. Without the flag,
+or on other databases, this revision is a no-op.
+
+The partitioned table's primary key becomes (id, financial_work_id), since
+PostgreSQL requires the partition key in every unique constraint. For the
+same reason the mapped_ledger_entry.trial_balance_entry_id foreign key is
+dropped; mapping_service already checks that entries belong to the work.
+
+Revision ID: 0003_partition_trial_balance
+Revises: 0002_hot_path_indexes
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+
+revision = "0003_partition_trial_balance"
+down_revision = "0002_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+_MLE_FK = "mapped_ledger_entry_trial_balance_entry_id_fkey"
+_COLUMNS = "id, financial_work_id, account_name, debit, credit, closing_balance"
+
+
+def _partitions() -> int:
+    return int(context.get_x_argument(as_dictionary=True).get("tb_partitions", 0))
+
+
+def _is_partitioned() -> bool:
+    return bool(op.get_bind().exec_driver_sql(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'trial_balance_entry'::regclass"
+    ).scalar())
+
+
+def upgrade() -> None:
+    partitions = _partitions()
+    if op.get_bind().dialect.name != "postgresql" or partitions < 1:
+        return
+
+    op.execute(f"""
+        CREATE TABLE trial_balance_entry_new (
+            id INTEGER NOT NULL DEFAULT nextval('trial_balance_entry_id_seq'),
+            financial_work_id INTEGER NOT NULL REFERENCES financial_work (id),
+            account_name VARCHAR(255) NOT NULL,
+            debit NUMERIC(18, 2) NOT NULL,
+            credit NUMERIC(18, 2) NOT NULL,
+            closing_balance NUMERIC(18, 2) NOT NULL,
+            CONSTRAINT trial_balance_entry_new_pkey PRIMARY KEY (id, financial_work_id)
+        ) PARTITION BY HASH (financial_work_id)
+    """)
+    for i in range(partitions):
+        op.execute(
+            f"CREATE TABLE trial_balance_entry_p{i} PARTITION OF trial_balance_entry_new "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i})"
+        )
+    op.execute(f"INSERT INTO trial_balance_entry_new ({_COLUMNS}) SELECT {_COLUMNS} FROM trial_balance_entry")
+
+    op.execute(f"ALTER TABLE mapped_ledger_entry DROP CONSTRAINT IF EXISTS {_MLE_FK}")
+    op.execute("ALTER SEQUENCE trial_balance_entry_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE trial_balance_entry")
+    op.execute("ALTER TABLE trial_balance_entry_new RENAME TO trial_balance_entry")
+    op.execute("ALTER TABLE trial_balance_entry RENAME CONSTRAINT trial_balance_entry_new_pkey TO trial_balance_entry_pkey")
+    op.execute("ALTER SEQUENCE trial_balance_entry_id_seq OWNED BY trial_balance_entry.id")
+    # Created on the parent, so every partition gets its own copy.
+    op.create_index("ix_trial_balance_entry_work_id_id", "trial_balance_entry", ["financial_work_id", "id"])
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql" or not _is_partitioned():
+        return
+
+    op.execute("""
+        CREATE TABLE trial_balance_entry_new (
+            id INTEGER NOT NULL DEFAULT nextval('trial_balance_entry_id_seq'),
+            financial_work_id INTEGER NOT NULL REFERENCES financial_work (id),
+            account_name VARCHAR(255) NOT NULL,
+            debit NUMERIC(18, 2) NOT NULL,
+            credit NUMERIC(18, 2) NOT NULL,
+            closing_balance NUMERIC(18, 2) NOT NULL,
+            CONSTRAINT trial_balance_entry_new_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"INSERT INTO trial_balance_entry_new ({_COLUMNS}) SELECT {_COLUMNS} FROM trial_balance_entry")
+    op.execute("ALTER SEQUENCE trial_balance_entry_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE trial_balance_entry")  # drops the partitions too
+    op.execute("ALTER TABLE trial_balance_entry_new RENAME TO trial_balance_entry")
+    op.execute("ALTER TABLE trial_balance_entry RENAME CONSTRAINT trial_balance_entry_new_pkey TO trial_balance_entry_pkey")
+    op.execute("ALTER SEQUENCE trial_balance_entry_id_seq OWNED BY trial_balance_entry.id")
+    op.create_index("ix_trial_balance_entry_work_id_id", "trial_balance_entry", ["financial_work_id", "id"])
+    op.create_foreign_key(_MLE_FK, "mapped_ledger_entry", "trial_balance_entry", ["trial_balance_entry_id"], ["id"])
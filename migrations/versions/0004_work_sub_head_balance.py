@@ -0,0 +1,34 @@
+"""Per-work sub-head balance table, backfilled from existing mappings
+
+Revision ID: 0004_work_sub_head_balance
+Revises: 0003_partition_trial_balance
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_work_sub_head_balance"
+down_revision = "0003_partition_trial_balance"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "work_sub_head_balance",
+        sa.Column("financial_work_id", sa.Integer, sa.ForeignKey("financial_work.id"), primary_key=True),
+        sa.Column("account_sub_head_id", sa.Integer, sa.ForeignKey("account.id"), primary_key=True),
+        sa.Column("balance", sa.Numeric(18, 2), nullable=False),
+        sa.Column("entry_count", sa.Integer, nullable=False),
+    )
+    op.execute("""
+        INSERT INTO work_sub_head_balance (financial_work_id, account_sub_head_id, balance, entry_count)
+        SELECT t.financial_work_id, m.account_sub_head_id, COALESCE(SUM(t.closing_balance), 0), COUNT(*)
+        FROM mapped_ledger_entry m
+        JOIN trial_balance_entry t ON t.id = m.trial_balance_entry_id
+        GROUP BY t.financial_work_id, m.account_sub_head_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("work_sub_head_balance")
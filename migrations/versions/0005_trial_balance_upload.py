@@ -0,0 +1,29 @@
+"""Trial balance upload log with content hashes
+
+Revision ID: 0005_trial_balance_upload
+Revises: 0004_work_sub_head_balance
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_trial_balance_upload"
+down_revision = "0004_work_sub_head_balance"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "trial_balance_upload",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("financial_work_id", sa.Integer, sa.ForeignKey("financial_work.id"), nullable=False),
+        sa.Column("sha256", sa.String(64), nullable=False),
+        sa.Column("mode", sa.String(16), nullable=False),
+    )
+    op.create_index("ix_trial_balance_upload_financial_work_id", "trial_balance_upload", ["financial_work_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_trial_balance_upload_financial_work_id", table_name="trial_balance_upload")
+    op.drop_table("trial_balance_upload")
@@ -0,0 +1,32 @@
+"""Consolidation groups of works
+
+Revision ID: 0006_consolidation_group
+Revises: 0005_trial_balance_upload
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_consolidation_group"
+down_revision = "0005_trial_balance_upload"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "consolidation_group",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+    )
+    op.create_table(
+        "consolidation_member",
+        sa.Column("group_id", sa.Integer, sa.ForeignKey("consolidation_group.id"), primary_key=True),
+        sa.Column("financial_work_id", sa.Integer, sa.ForeignKey("financial_work.id"), primary_key=True),
+        sa.Column("position", sa.Integer, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("consolidation_member")
+    op.drop_table("consolidation_group")
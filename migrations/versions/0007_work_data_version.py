@@ -0,0 +1,34 @@
+"""financial_work.data_version
+
+It predates the migration series but was missing from the baseline, so
+databases stamped at 0001_baseline never got it. Skipped where the column
+already exists. Also drops account_closure, an unused hierarchy index
+that create_all made on databases of that era; the rollups walk the
+chart snapshot's parent index instead.
+
+Revision ID: 0007_work_data_version
+Revises: 0006_consolidation_group
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_work_data_version"
+down_revision = "0006_consolidation_group"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "data_version" not in {c["name"] for c in inspector.get_columns("financial_work")}:
+        op.add_column(
+            "financial_work", sa.Column("data_version", sa.Integer, nullable=False, server_default="0")
+        )
+    if inspector.has_table("account_closure"):
+        op.drop_table("account_closure")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("financial_work") as batch:
+        batch.drop_column("data_version")
@@ -0,0 +1,26 @@
+"""Chart of accounts version counter
+
+Revision ID: 0008_chart_version
+Revises: 0007_work_data_version
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_chart_version"
+down_revision = "0007_work_data_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    chart_version = op.create_table(
+        "chart_version",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("version", sa.Integer, nullable=False),
+    )
+    op.bulk_insert(chart_version, [{"id": 1, "version": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("chart_version")
@@ -0,0 +1,70 @@
+import datetime
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.core.dependencies import get_async_db, get_async_sessionmaker, get_db, get_sessionmaker
+from app.main import app
+from app.models.domain import Base, Company, FinancialWork
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def work(db):
+    company = Company(legal_name="Acme Pvt Ltd")
+    db.add(company)
+    db.flush()
+    work = FinancialWork(
+        company_id=company.id,
+        start_date=datetime.date(2024, 4, 1),
+        end_date=datetime.date(2025, 3, 31),
+    )
+    db.add(work)
+    db.commit()
+    return work
+
+
+@pytest.fixture
+def api_engine(tmp_path):
+    # A file database, so the sync and async engines see the same data.
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.sqlite'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(api_engine):
+    sync_sessions = sessionmaker(bind=api_engine, autoflush=False)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{api_engine.url.database}", poolclass=NullPool)
+    async_sessions = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    def override_db():
+        with sync_sessions() as session:
+            yield session
+
+    async def override_async_db():
+        async with async_sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_async_db] = override_async_db
+    app.dependency_overrides[get_sessionmaker] = lambda: sync_sessions
+    app.dependency_overrides[get_async_sessionmaker] = lambda: async_sessions
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
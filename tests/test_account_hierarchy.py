@@ -0,0 +1,111 @@
+import datetime
+import pytest
+from decimal import Decimal
+from sqlalchemy import event, update
+from app.models.domain import Account, AccountNodeType, FinancialWork, TrialBalanceEntry
+from app.schemas.mapping_schemas import MapEntryPayload
+from app.services import account_service, mapping_service
+from app.services.chart_service import chart_version_bump, get_chart_snapshot
+from app.services.statement_generation_service import (
+    calculate_comparative_data,
+    calculate_statement_data,
+    comparative_works,
+    get_statement_data,
+    statement_cache,
+)
+
+
+def test_deep_hierarchy_rolls_up_to_every_ancestor(db, work):
+    cat = account_service.create_account(db, "Assets", AccountNodeType.CATEGORY)
+    head = account_service.create_account(db, "Current Assets", AccountNodeType.HEAD, parent_id=cat.id)
+    group = account_service.create_account(db, "Cash & Bank", AccountNodeType.HEAD, parent_id=head.id)
+    sub = account_service.create_account(db, "Bank", AccountNodeType.SUB_HEAD, parent_id=group.id)
+
+    db.add(TrialBalanceEntry(financial_work_id=work.id, account_name="HDFC", closing_balance=Decimal("150.25")))
+    db.commit()
+    mapping_service.create_mapping(db, MapEntryPayload(trial_balance_entry_id=1, account_sub_head_id=sub.id))
+
+    data = calculate_statement_data(db, work.id)
+    assert data["by_sub_head"] == {sub.id: Decimal("150.25")}
+    assert data["by_head"] == {head.id: Decimal("150.25"), group.id: Decimal("150.25")}
+    assert data["by_category"] == {cat.id: Decimal("150.25")}
+
+
+def test_move_subtree_rolls_up_under_new_parent(db, work):
+    a = account_service.create_account(db, "A", AccountNodeType.CATEGORY)
+    b = account_service.create_account(db, "B", AccountNodeType.CATEGORY)
+    h = account_service.create_account(db, "H", AccountNodeType.HEAD, parent_id=a.id)
+    s = account_service.create_account(db, "S", AccountNodeType.SUB_HEAD, parent_id=h.id)
+    db.add(TrialBalanceEntry(financial_work_id=work.id, account_name="HDFC", closing_balance=Decimal("5")))
+    db.commit()
+    mapping_service.create_mapping(db, MapEntryPayload(trial_balance_entry_id=1, account_sub_head_id=s.id))
+
+    account_service.update_account(db, h.id, parent_id=b.id)
+    assert calculate_statement_data(db, work.id)["by_category"] == {b.id: Decimal("5")}
+
+
+def test_chart_change_from_another_process_is_seen(db, work):
+    statement_cache.clear()
+    a = account_service.create_account(db, "A", AccountNodeType.CATEGORY)
+    b = account_service.create_account(db, "B", AccountNodeType.CATEGORY)
+    s = account_service.create_account(db, "S", AccountNodeType.SUB_HEAD, parent_id=a.id)
+    db.add(TrialBalanceEntry(financial_work_id=work.id, account_name="HDFC", closing_balance=Decimal("5")))
+    db.commit()
+    mapping_service.create_mapping(db, MapEntryPayload(trial_balance_entry_id=1, account_sub_head_id=s.id))
+    assert get_statement_data(db, work.id)["by_category"] == {a.id: Decimal("5")}
+
+    # What update_account commits in another worker, whose invalidate_chart()
+    # never reaches this process's snapshot.
+    db.execute(update(Account).where(Account.id == s.id).values(parent_id=b.id))
+    db.execute(update(FinancialWork).values(data_version=FinancialWork.data_version + 1))
+    db.execute(chart_version_bump())
+    db.commit()
+    assert get_statement_data(db, work.id)["by_category"] == {b.id: Decimal("5")}
+
+
+def test_move_under_own_descendant_is_rejected(db):
+    a = account_service.create_account(db, "A", AccountNodeType.CATEGORY)
+    h = account_service.create_account(db, "H", AccountNodeType.HEAD, parent_id=a.id)
+    s = account_service.create_account(db, "S", AccountNodeType.SUB_HEAD, parent_id=h.id)
+    with pytest.raises(ValueError):
+        account_service.update_account(db, h.id, parent_id=s.id)
+
+
+def test_chart_snapshot_is_invalidated_by_account_writes(db):
+    cat = account_service.create_account(db, "Assets", AccountNodeType.CATEGORY)
+    head = account_service.create_account(db, "Current Assets", AccountNodeType.HEAD, parent_id=cat.id)
+    snap = get_chart_snapshot(db)
+    assert get_chart_snapshot(db) is snap
+    assert list(snap.parent_idx) == [-1, 0]
+    assert snap.labels([head.id, 999]) == {head.id: "Current Assets"}
+
+    account_service.update_account(db, head.id, name="Current")
+    assert get_chart_snapshot(db).name(head.id) == "Current"
+
+
+def test_comparative_data_matches_per_work_aggregates(db, work):
+    cat = account_service.create_account(db, "Assets", AccountNodeType.CATEGORY)
+    sub = account_service.create_account(db, "Bank", AccountNodeType.SUB_HEAD, parent_id=cat.id)
+    prior = FinancialWork(company_id=work.company_id, start_date=datetime.date(2023, 4, 1), end_date=datetime.date(2024, 3, 31))
+    db.add(prior)
+    db.flush()
+    for w, amount in ((work, "10"), (prior, "7")):
+        entry = TrialBalanceEntry(financial_work_id=w.id, account_name="HDFC", closing_balance=Decimal(amount))
+        db.add(entry)
+        db.flush()
+        mapping_service.create_mapping(db, MapEntryPayload(trial_balance_entry_id=entry.id, account_sub_head_id=sub.id))
+
+    works = comparative_works(db, work.id, prior_periods=4)
+    assert [w.id for w in works] == [work.id, prior.id]
+
+    get_chart_snapshot(db)
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+    data = calculate_comparative_data(db, works)
+    # One query over the balances, then the chart version check.
+    assert len(statements) == 2 and "work_sub_head_balance" in statements[0]
+    assert [c["label"] for c in data["columns"]] == ["31 Mar 2025", "31 Mar 2024"]
+    for column, w in zip(data["columns"], works):
+        expected = calculate_statement_data(db, w.id)
+        assert {k: column[k] for k in expected} == expected
+    assert data["by_category"] == {cat.id: Decimal("10")}
@@ -0,0 +1,37 @@
+from decimal import Decimal
+import numpy as np
+from app.models.domain import AccountNodeType
+from app.services import account_service
+from app.services.aggregation_engine import bucket_totals, rollup
+from app.services.chart_service import load_chart_snapshot
+
+
+def test_rollup_is_exact_and_follows_moved_parents(db):
+    sub = account_service.create_account(db, "Bank", AccountNodeType.SUB_HEAD)
+    cat = account_service.create_account(db, "Assets", AccountNodeType.CATEGORY)
+    head = account_service.create_account(db, "Current", AccountNodeType.HEAD, parent_id=cat.id)
+    account_service.update_account(db, sub.id, parent_id=head.id)  # parent ids now sort after the child's
+    chart = load_chart_snapshot(db)
+
+    n = 100_000
+    ids = np.full(n, sub.id)
+    minor = np.full(n, 10)  # 0.10 each: float summing would drift
+    totals, touched = rollup(chart, ids, minor)
+    buckets = bucket_totals(chart, totals[0], touched[0])
+    assert buckets[AccountNodeType.SUB_HEAD] == {sub.id: Decimal("10000.00")}
+    assert buckets[AccountNodeType.HEAD] == {head.id: Decimal("10000.00")}
+    assert buckets[AccountNodeType.CATEGORY] == {cat.id: Decimal("10000.00")}
+
+
+def test_rollup_groups_are_independent(db):
+    cat = account_service.create_account(db, "Assets", AccountNodeType.CATEGORY)
+    a = account_service.create_account(db, "A", AccountNodeType.SUB_HEAD, parent_id=cat.id)
+    b = account_service.create_account(db, "B", AccountNodeType.SUB_HEAD, parent_id=cat.id)
+    chart = load_chart_snapshot(db)
+
+    totals, touched = rollup(chart, [a.id, b.id, a.id], [150, -25, 5], groups=[0, 0, 1], n_groups=2)
+    first = bucket_totals(chart, totals[0], touched[0], account_ids={cat.id, a.id})
+    second = bucket_totals(chart, totals[1], touched[1])
+    assert first[AccountNodeType.CATEGORY] == {cat.id: Decimal("1.25")}
+    assert first[AccountNodeType.SUB_HEAD] == {a.id: Decimal("1.50")}
+    assert second[AccountNodeType.SUB_HEAD] == {a.id: Decimal("0.05")}
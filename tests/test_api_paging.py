@@ -0,0 +1,60 @@
+import datetime
+import json
+from sqlalchemy.orm import Session
+from app.models.domain import Company, FinancialWork, TrialBalanceEntry
+
+
+def _seed_entries(engine, count: int) -> int:
+    with Session(engine) as db:
+        company = Company(legal_name="Acme Pvt Ltd")
+        db.add(company)
+        db.flush()
+        work = FinancialWork(company_id=company.id, start_date=datetime.date(2024, 4, 1), end_date=datetime.date(2025, 3, 31))
+        db.add(work)
+        db.flush()
+        db.add_all(TrialBalanceEntry(financial_work_id=work.id, account_name=f"A{i}", closing_balance=i) for i in range(count))
+        db.commit()
+        return work.id
+
+
+def test_accounts_are_unpaged_unless_asked(client):
+    ids = [client.post("/accounts", params={"name": f"Cat {i}", "type": "CATEGORY", "category_type": "ASSET"}).json()["id"]
+           for i in range(3)]
+
+    response = client.get("/accounts")
+    assert [a["id"] for a in response.json()] == ids
+    assert "x-next-cursor" not in response.headers
+
+    page = client.get("/accounts", params={"limit": 2})
+    assert [a["id"] for a in page.json()] == ids[:2]
+    assert page.headers["x-next-cursor"] == str(ids[1])
+
+    rest = client.get("/accounts", params={"after_id": page.headers["x-next-cursor"]})
+    assert [a["id"] for a in rest.json()] == ids[2:]
+
+
+def test_unmapped_entries_are_unpaged_unless_asked(client, api_engine):
+    work_id = _seed_entries(api_engine, 1500)
+
+    response = client.get(f"/works/{work_id}/unmapped-entries")
+    assert len(response.json()) == 1500
+    assert "x-next-cursor" not in response.headers
+
+    first = client.get(f"/works/{work_id}/unmapped-entries", params={"limit": 1000})
+    rest = client.get(f"/works/{work_id}/unmapped-entries", params={"after_id": first.headers["x-next-cursor"]})
+    assert len(first.json()) + len(rest.json()) == 1500
+
+
+def test_lists_stream_as_ndjson(client, api_engine):
+    work_id = _seed_entries(api_engine, 5)
+    ids = [client.post("/accounts", params={"name": f"Cat {i}", "type": "CATEGORY", "category_type": "ASSET"}).json()["id"]
+           for i in range(3)]
+    ndjson = {"Accept": "application/x-ndjson"}
+
+    response = client.get("/accounts", params={"after_id": ids[0]}, headers=ndjson)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ids[1:]
+
+    response = client.get(f"/works/{work_id}/unmapped-entries", headers=ndjson)
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r["account_name"], r["closing_balance"]) for r in rows] == [(f"A{i}", float(i)) for i in range(5)]
@@ -0,0 +1,45 @@
+import os
+from app.models.domain import ReportTemplate
+from app.services.artifact_store import LocalArtifactStore, artifact_key
+
+
+def test_key_depends_on_data_and_format():
+    template = ReportTemplate(name="BS", template_definition="[]")
+    data = {"by_sub_head": {1: 10}, "by_head": {}, "by_category": {}}
+    key = artifact_key(template, data, "pdf")
+    assert key == artifact_key(template, dict(data), "pdf")
+    assert key != artifact_key(template, data, "xlsx")
+    assert key != artifact_key(template, {**data, "by_head": {2: 10}}, "pdf")
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path):
+    store = LocalArtifactStore(str(tmp_path), max_bytes=25)
+    store.put("aa01", b"x" * 10)
+    store.put("bb02", b"y" * 10)
+    os.utime(store._path("aa01"), (1, 1))
+    os.utime(store._path("bb02"), (2, 2))
+    assert store.get("aa01") == b"x" * 10  # refreshes aa01
+    store.put("cc03", b"z" * 10)
+    assert store.get("bb02") is None
+    assert store.get("aa01") is not None and store.get("cc03") is not None
+
+
+def test_overwrite_counts_only_the_new_size(tmp_path):
+    store = LocalArtifactStore(str(tmp_path), max_bytes=100)
+    store.put("aa01", b"x" * 10)
+    store.put("aa01", b"x" * 10)
+    store.put("bb02", b"y" * 10)
+    store.put("bb02", b"y" * 12)
+    assert store._size == 22
+
+
+def test_eviction_skips_writes_in_progress(tmp_path):
+    store = LocalArtifactStore(str(tmp_path), max_bytes=15)
+    partial = tmp_path / "cc" / ".tmp-abc"
+    partial.parent.mkdir()
+    partial.write_bytes(b"p" * 10)
+    os.utime(partial, (1, 1))
+    store.put("aa01", b"x" * 10)
+    store.put("bb02", b"y" * 10)
+    assert partial.exists()
+    assert store.get("aa01") is None and store.get("bb02") == b"y" * 10
@@ -0,0 +1,93 @@
+import asyncio
+import datetime
+import io
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from openpyxl import load_workbook
+from sqlalchemy.orm import Session
+from app.api.streaming import zip_response
+from app.models.domain import AccountNodeType, Company, FinancialWork, ReportTemplate, StatementType, TrialBalanceEntry
+from app.schemas.mapping_schemas import MapEntryPayload
+from app.services import account_service, mapping_service, render_job_service
+from app.services.artifact_store import LocalArtifactStore
+from app.services.statement_generation_service import calculate_statement_data, calculate_statement_data_many
+
+
+def test_zip_response_streams_each_member():
+    async def files():
+        for i in range(3):
+            yield f"work-{i}/bs.pdf", bytes([i]) * 1000
+
+    async def body(response):
+        return [chunk async for chunk in response.body_iterator]
+
+    response = zip_response(files(), "statements.zip")
+    chunks = asyncio.run(body(response))
+    assert response.media_type == "application/zip"
+    # One chunk per member as it is added, then the central directory.
+    assert len(chunks) == 4
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.namelist() == ["work-0/bs.pdf", "work-1/bs.pdf", "work-2/bs.pdf"]
+    assert archive.read("work-2/bs.pdf") == bytes([2]) * 1000
+
+
+def test_bulk_data_matches_per_work_aggregates(db, work):
+    cat = account_service.create_account(db, "Assets", AccountNodeType.CATEGORY)
+    bank = account_service.create_account(db, "Bank", AccountNodeType.SUB_HEAD, parent_id=cat.id)
+    other = FinancialWork(company_id=work.company_id, start_date=datetime.date(2023, 4, 1), end_date=datetime.date(2024, 3, 31))
+    db.add(other)
+    db.flush()
+    for w, amount in ((work, "10"), (other, "7.50")):
+        entry = TrialBalanceEntry(financial_work_id=w.id, account_name="HDFC", closing_balance=Decimal(amount))
+        db.add(entry)
+        db.flush()
+        mapping_service.create_mapping(db, MapEntryPayload(trial_balance_entry_id=entry.id, account_sub_head_id=bank.id))
+
+    scopes = [None, {cat.id}]
+    data = calculate_statement_data_many(db, [work.id, other.id], scopes)
+    for row, w in zip(data, (work, other)):
+        assert row == [calculate_statement_data(db, w.id, scope) for scope in scopes]
+    assert data[1][1] == {"by_sub_head": {}, "by_head": {}, "by_category": {cat.id: Decimal("7.50")}}
+
+
+def test_statement_batch_endpoint_zips_every_statement(client, api_engine, tmp_path, monkeypatch):
+    # Renders for real, on a thread instead of the spawn process pool.
+    pool = ThreadPoolExecutor(1)
+    monkeypatch.setattr(render_job_service, "_get_executor", lambda: pool)
+    monkeypatch.setattr(render_job_service, "artifact_store", LocalArtifactStore(str(tmp_path), 1 << 20))
+    with Session(api_engine) as db:
+        cat = account_service.create_account(db, "Assets", AccountNodeType.CATEGORY)
+        bank = account_service.create_account(db, "Bank", AccountNodeType.SUB_HEAD, parent_id=cat.id)
+        company = Company(legal_name="Acme Pvt Ltd")
+        db.add(company)
+        db.flush()
+        works = [FinancialWork(company_id=company.id, start_date=datetime.date(y, 4, 1), end_date=datetime.date(y + 1, 3, 31))
+                 for y in (2023, 2024)]
+        template = ReportTemplate(name="Balance Sheet", statement_type=StatementType.BALANCE_SHEET, template_definition=json.dumps(
+            [{"type": "sub_head", "account_id": bank.id}, {"type": "total", "label": "Total", "account_id": cat.id}]))
+        db.add_all([*works, template])
+        db.flush()
+        for w, amount in zip(works, ("7.50", "10")):
+            entry = TrialBalanceEntry(financial_work_id=w.id, account_name="HDFC", closing_balance=Decimal(amount))
+            db.add(entry)
+            db.flush()
+            mapping_service.create_mapping(db, MapEntryPayload(trial_balance_entry_id=entry.id, account_sub_head_id=bank.id))
+        work_ids, template_id = [w.id for w in works], template.id
+
+    try:
+        response = client.post("/works/statement-batch",
+                               json={"work_ids": work_ids, "template_ids": [template_id], "format": "xlsx"})
+    finally:
+        pool.shutdown()
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    names = [f"work-{w}/{template_id}-Balance Sheet.xlsx" for w in work_ids]
+    assert sorted(archive.namelist()) == sorted(names)
+    for name, amount in zip(names, (7.5, 10)):
+        ws = load_workbook(io.BytesIO(archive.read(name))).active
+        assert [row[3].value for row in ws.iter_rows(min_row=3) if row[3].value is not None] == [amount, amount]
+
+    missing = client.post("/works/statement-batch", json={"work_ids": [999], "template_ids": [template_id]})
+    assert missing.status_code == 404
@@ -0,0 +1,16 @@
+import json
+from benchmarks import datagen, run
+
+
+def test_trial_balance_csv_is_deterministic():
+    assert datagen.trial_balance_csv(50, seed=1) == datagen.trial_balance_csv(50, seed=1)
+    assert datagen.trial_balance_csv(50, seed=1) != datagen.trial_balance_csv(50, seed=2)
+
+
+def test_benchmark_smoke_run_writes_json(tmp_path):
+    report = run.main(["--rows", "200", "--no-render", "--out", str(tmp_path)])
+    cases = {r["case"]: r for r in report["runs"][0]["results"]}
+    assert cases["parse+ingest"]["rows"] == 200
+    assert cases["calculate_statement"]["rows"] + cases["list_unmapped"]["rows"] == 200
+    [path] = tmp_path.glob("bench-*.json")
+    assert json.loads(path.read_text())["runs"][0]["rows"] == 200
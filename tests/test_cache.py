@@ -0,0 +1,17 @@
+from app.core.cache import InProcessCache
+
+
+def test_lru_eviction():
+    cache = InProcessCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_ttl_expiry():
+    cache = InProcessCache(max_entries=2, ttl_seconds=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
@@ -0,0 +1,58 @@
+import datetime
+import pytest
+from decimal import Decimal
+from sqlalchemy import event
+from app.models.domain import AccountNodeType, Company, FinancialWork, TrialBalanceEntry
+from app.schemas.consolidation_schemas import ConsolidationGroupCreate
+from app.schemas.mapping_schemas import MapEntryPayload
+from app.services import account_service, consolidation_service, mapping_service
+from app.services.chart_service import get_chart_snapshot
+from app.services.statement_generation_service import calculate_consolidated_data, calculate_statement_data
+
+
+def _subsidiary(db, name, end=datetime.date(2025, 3, 31)):
+    company = Company(legal_name=name)
+    db.add(company)
+    db.flush()
+    work = FinancialWork(company_id=company.id, start_date=datetime.date(2024, 4, 1), end_date=end)
+    db.add(work)
+    db.commit()
+    return work
+
+
+def test_consolidated_data_sums_entities_with_breakdown(db, work):
+    cat = account_service.create_account(db, "Assets", AccountNodeType.CATEGORY)
+    bank = account_service.create_account(db, "Bank", AccountNodeType.SUB_HEAD, parent_id=cat.id)
+    cash = account_service.create_account(db, "Cash", AccountNodeType.SUB_HEAD, parent_id=cat.id)
+    sub = _subsidiary(db, "Acme Retail Ltd")
+    for w, sub_head, amount in ((work, bank, "10.25"), (sub, bank, "4"), (sub, cash, "1.50")):
+        entry = TrialBalanceEntry(financial_work_id=w.id, account_name="X", closing_balance=Decimal(amount))
+        db.add(entry)
+        db.flush()
+        mapping_service.create_mapping(db, MapEntryPayload(trial_balance_entry_id=entry.id, account_sub_head_id=sub_head.id))
+
+    group = consolidation_service.create_group(db, ConsolidationGroupCreate(name="Acme Group", work_ids=[work.id, sub.id]))
+    works = consolidation_service.group_works(db, group.id)
+
+    get_chart_snapshot(db)
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+    data = calculate_consolidated_data(db, works)
+    # One query over the balances, then the chart version check.
+    assert len(statements) == 2 and "work_sub_head_balance" in statements[0]
+    assert data["by_sub_head"] == {bank.id: Decimal("14.25"), cash.id: Decimal("1.50")}
+    assert data["by_category"] == {cat.id: Decimal("15.75")}
+    assert [(c["work_id"], c["label"]) for c in data["columns"]] == [
+        (None, "Consolidated"), (work.id, "Acme Pvt Ltd"), (sub.id, "Acme Retail Ltd")]
+    for column, w in zip(data["columns"][1:], works):
+        expected = calculate_statement_data(db, w.id)
+        assert {k: column[k] for k in expected} == expected
+    assert "columns" not in calculate_consolidated_data(db, works, breakdown=False)
+
+
+def test_group_members_must_share_period_end(db, work):
+    other = _subsidiary(db, "Acme Retail Ltd", end=datetime.date(2024, 12, 31))
+    with pytest.raises(ValueError, match="same date"):
+        consolidation_service.create_group(db, ConsolidationGroupCreate(name="G", work_ids=[work.id, other.id]))
+    with pytest.raises(ValueError, match="not found"):
+        consolidation_service.create_group(db, ConsolidationGroupCreate(name="G", work_ids=[work.id, 999]))
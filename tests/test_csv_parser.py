@@ -0,0 +1,51 @@
+from app.utils.csv_parser import iter_trial_balance_batches, parse_trial_balance_csv
+
+SAMPLE = (
+    "Account,Debit,Credit,Balance\n"
+    "Cash,\"1,000.50\",,1000.50\n"
+    "  Sales  ,-,—,\"-2,500\"\n"
+    "Rent,abc,300,-300\n"
+).encode()
+
+
+def test_parse_normalizes_numbers_and_names():
+    rows = parse_trial_balance_csv(SAMPLE)
+    assert rows == [
+        {"account_name": "Cash", "debit": 1000.5, "credit": 0.0, "closing_balance": 1000.5},
+        {"account_name": "Sales", "debit": 0.0, "credit": 0.0, "closing_balance": -2500.0},
+        {"account_name": "Rent", "debit": 0.0, "credit": 300.0, "closing_balance": -300.0},
+    ]
+
+
+def test_closing_falls_back_to_credit_column():
+    rows = parse_trial_balance_csv(b"account_name,debit,credit\nCash,10,4\n")
+    assert rows[0]["closing_balance"] == 4.0
+
+
+def test_batches_match_full_parse():
+    batches = list(iter_trial_balance_batches(SAMPLE, chunk_size=2))
+    assert [len(b) for b in batches] == [2, 1]
+    assert [r for b in batches for r in b.to_dict("records")] == parse_trial_balance_csv(SAMPLE)
+
+
+def test_xlsx_batches_match_csv_parse():
+    import io
+    from openpyxl import Workbook
+    from app.utils.xlsx_parser import detect_format, iter_trial_balance_file_batches
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["Account", "Debit", "Credit", "Balance"])
+    ws.append(["Cash", "1,000.50", None, 1000.5])
+    ws.append([None, None, None, None])
+    ws.append(["  Sales  ", "-", "—", -2500])
+    ws.append(["Rent", "abc", 300, -300])
+    stream = io.BytesIO()
+    wb.save(stream)
+    stream.seek(0)
+
+    assert detect_format(stream) == "xlsx" and stream.tell() == 0
+    batches = list(iter_trial_balance_file_batches(stream, chunk_size=2))
+    assert [len(b) for b in batches] == [2, 1]
+    assert [r for b in batches for r in b.to_dict("records")] == parse_trial_balance_csv(SAMPLE)
+    assert detect_format(io.BytesIO(SAMPLE)) == "csv"
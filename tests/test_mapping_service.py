@@ -0,0 +1,98 @@
+import datetime
+from decimal import Decimal
+from sqlalchemy import update
+from app.models.domain import AccountNodeType, FinancialWork, MappedLedgerEntry, TrialBalanceEntry, WorkSubHeadBalance
+from app.schemas.mapping_schemas import MapEntryPayload
+from app.services import account_service, balance_service, mapping_service
+
+
+def _setup(db, work, n=3):
+    cat = account_service.create_account(db, "Assets", AccountNodeType.CATEGORY)
+    head = account_service.create_account(db, "Current Assets", AccountNodeType.HEAD, parent_id=cat.id)
+    sub = account_service.create_account(db, "Bank", AccountNodeType.SUB_HEAD, parent_id=head.id)
+    entries = [TrialBalanceEntry(financial_work_id=work.id, account_name=f"E{i}", closing_balance=Decimal(i)) for i in range(n)]
+    db.add_all(entries)
+    db.commit()
+    return head, sub, entries
+
+
+def test_bulk_partial_commit_reports_per_item_errors(db, work):
+    head, sub, entries = _setup(db, work)
+    items = [
+        MapEntryPayload(trial_balance_entry_id=entries[0].id, account_sub_head_id=sub.id),
+        MapEntryPayload(trial_balance_entry_id=entries[0].id, account_sub_head_id=sub.id),
+        MapEntryPayload(trial_balance_entry_id=entries[1].id, account_sub_head_id=head.id),
+        MapEntryPayload(trial_balance_entry_id=999, account_sub_head_id=sub.id),
+        MapEntryPayload(trial_balance_entry_id=entries[2].id, account_sub_head_id=sub.id),
+    ]
+    result = mapping_service.create_mappings_bulk(db, work.id, items, atomic=False)
+    assert result.created == 2
+    assert [e.index for e in result.errors] == [1, 2, 3]
+    assert db.query(MappedLedgerEntry).count() == 2
+    assert work.data_version == 1
+
+
+def test_bulk_atomic_writes_nothing_on_error(db, work):
+    _, sub, entries = _setup(db, work)
+    items = [
+        MapEntryPayload(trial_balance_entry_id=entries[0].id, account_sub_head_id=sub.id),
+        MapEntryPayload(trial_balance_entry_id=entries[1].id, account_sub_head_id=12345),
+    ]
+    result = mapping_service.create_mappings_bulk(db, work.id, items)
+    assert result.created == 0 and len(result.errors) == 1
+    assert db.query(MappedLedgerEntry).count() == 0
+
+
+def test_auto_map_carries_forward_prior_year(db, work):
+    _, sub, entries = _setup(db, work, n=2)
+    mapping_service.create_mappings_bulk(db, work.id, [
+        MapEntryPayload(trial_balance_entry_id=e.id, account_sub_head_id=sub.id) for e in entries
+    ])
+    next_year = FinancialWork(
+        company_id=work.company_id,
+        start_date=datetime.date(2025, 4, 1),
+        end_date=datetime.date(2026, 3, 31),
+    )
+    db.add(next_year)
+    db.flush()
+    db.add_all([
+        TrialBalanceEntry(financial_work_id=next_year.id, account_name="E0", closing_balance=1),
+        TrialBalanceEntry(financial_work_id=next_year.id, account_name=" e-1 ", closing_balance=1),
+        TrialBalanceEntry(financial_work_id=next_year.id, account_name="New account", closing_balance=1),
+    ])
+    db.commit()
+
+    result = mapping_service.auto_map_from_history(db, next_year.id)
+    assert (result.exact, result.normalized, result.remaining) == (1, 1, 1)
+    mapped = {m.trial_entry.account_name for m in db.query(MappedLedgerEntry) if m.trial_entry.financial_work_id == next_year.id}
+    assert mapped == {"E0", " e-1 "}
+
+
+def test_list_unmapped_entries_keyset_pages(db, work):
+    _, sub, entries = _setup(db, work, n=5)
+    mapping_service.create_mapping(db, MapEntryPayload(trial_balance_entry_id=entries[1].id, account_sub_head_id=sub.id))
+    first = mapping_service.list_unmapped_entries(db, work.id, limit=2)
+    second = mapping_service.list_unmapped_entries(db, work.id, after_id=first[-1].id, limit=2)
+    assert [e.account_name for e in first + second] == ["E0", "E2", "E3", "E4"]
+
+
+def test_sub_head_balances_follow_mapping_changes(db, work):
+    _, sub, entries = _setup(db, work, n=4)
+    other = account_service.create_account(db, "Cash", AccountNodeType.SUB_HEAD, parent_id=sub.parent_id)
+    mapping_service.create_mapping(db, MapEntryPayload(trial_balance_entry_id=entries[1].id, account_sub_head_id=sub.id))
+    mapping_service.create_mappings_bulk(db, work.id, [
+        MapEntryPayload(trial_balance_entry_id=entries[2].id, account_sub_head_id=sub.id),
+        MapEntryPayload(trial_balance_entry_id=entries[3].id, account_sub_head_id=other.id),
+    ])
+    assert mapping_service.unmap_entries(db, work.id, [entries[3].id, 999]) == 1
+
+    balances = {b.account_sub_head_id: (b.balance, b.entry_count) for b in db.query(WorkSubHeadBalance)}
+    assert balances == {sub.id: (Decimal(3), 2)}
+    assert balance_service.verify_sub_head_balances(db) == []
+
+    db.execute(update(WorkSubHeadBalance).values(balance=0))
+    db.commit()
+    [drift] = balance_service.verify_sub_head_balances(db, work.id)
+    assert (drift["stored"], drift["actual"]) == (Decimal("0.00"), Decimal("3.00"))
+    assert balance_service.rebuild_sub_head_balances(db, work.id) == 1
+    assert balance_service.verify_sub_head_balances(db) == []
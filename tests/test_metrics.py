@@ -0,0 +1,35 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+from app.core.metrics import Histogram, ServerTimingMiddleware, render_prometheus, span
+
+
+def test_server_timing_includes_spans_from_threadpool():
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    def work():
+        with span("render"):
+            return 1
+
+    @app.get("/x")
+    async def x():
+        with span("aggregate"):
+            pass
+        return {"v": await run_in_threadpool(work)}
+
+    header = TestClient(app).get("/x").headers["server-timing"]
+    names = [entry.split(";")[0] for entry in header.split(", ")]
+    assert names == ["aggregate", "render", "app"]
+    assert 'smartfs_stage_seconds_count{stage="render"}' in render_prometheus()
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1))
+    for v in (0.05, 0.5, 5):
+        h.observe(v, "s")
+    lines = h.expose()
+    assert 't_seconds_bucket{stage="s",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{stage="s",le="1.0"} 2' in lines
+    assert 't_seconds_bucket{stage="s",le="+Inf"} 3' in lines
+    assert 't_seconds_count{stage="s"} 3' in lines
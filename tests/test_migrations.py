@@ -0,0 +1,36 @@
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+from app.models.domain import Base
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _upgrade(conn, revision):
+    cfg = Config(str(ROOT / "alembic.ini"))
+    cfg.set_main_option("script_location", str(ROOT / "migrations"))
+    cfg.attributes["configure_logger"] = False
+    cfg.attributes["connection"] = conn
+    command.upgrade(cfg, revision)
+
+
+def test_baseline_database_upgrades_to_current_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    with engine.begin() as conn:
+        _upgrade(conn, "0001_baseline")
+        # The pre-migration create_all schema had no data_version.
+        assert "data_version" not in {c["name"] for c in inspect(conn).get_columns("financial_work")}
+        # Left behind by create_all on databases of that era; no longer used.
+        conn.execute(text("CREATE TABLE account_closure (ancestor_id INTEGER, descendant_id INTEGER, depth INTEGER)"))
+        conn.execute(text("INSERT INTO company (id, legal_name) VALUES (1, 'Acme')"))
+        conn.execute(text("INSERT INTO financial_work (id, company_id, start_date, end_date, status) "
+                          "VALUES (1, 1, '2024-04-01', '2025-03-31', 'PENDING')"))
+        conn.execute(text("INSERT INTO account (id, name, type, parent_id) VALUES "
+                          "(1, 'Assets', 'CATEGORY', NULL), (2, 'Current', 'HEAD', 1), (3, 'Bank', 'SUB_HEAD', 2)"))
+
+        _upgrade(conn, "head")
+        assert set(Base.metadata.tables) == set(inspect(conn).get_table_names()) - {"alembic_version"}
+        assert conn.execute(text("SELECT data_version FROM financial_work")).scalar() == 0
+        assert conn.execute(text("SELECT id, version FROM chart_version")).all() == [(1, 0)]
+    engine.dispose()
@@ -0,0 +1,51 @@
+from sqlalchemy import event, select
+from app.models.domain import Account
+from app.services.chart_service import get_chart_snapshot
+from app.services.mapping_service import unmapped_entries_stmt
+from app.services.statement_generation_service import calculate_statement_data
+
+
+def _plans(db, run) -> list[str]:
+    """Runs `run()` and returns the EXPLAIN QUERY PLAN details of every SELECT it issued."""
+    statements = []
+    conn = db.connection()
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(conn, "before_cursor_execute", capture)
+    cursor = conn.connection.driver_connection.cursor()
+    return [
+        " | ".join(row[-1] for row in cursor.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall())
+        for sql, params in statements
+    ]
+
+
+def _no_table_scan(plan: str, table: str) -> bool:
+    return f"SCAN {table}" not in plan.replace(" AS ", " ")
+
+
+def test_unmapped_listing_uses_work_index(db, work):
+    work_id = work.id
+    [plan] = _plans(db, lambda: db.execute(unmapped_entries_stmt(work_id, after_id=10).limit(100)).all())
+    assert "ix_trial_balance_entry_work_id_id" in plan
+    assert _no_table_scan(plan, "trial_balance_entry")
+
+
+def test_statement_aggregate_reads_only_sub_head_balances(db, work):
+    work_id = work.id
+    get_chart_snapshot(db)
+    # The balances, then the chart version check.
+    plan, _ = _plans(db, lambda: calculate_statement_data(db, work_id))
+    assert "trial_balance_entry" not in plan
+    assert "SEARCH work_sub_head_balance USING" in plan
+
+
+def test_children_lookup_uses_parent_index(db):
+    [plan] = _plans(db, lambda: db.execute(select(Account.id).where(Account.parent_id == 1)).all())
+    assert "ix_account_parent_id" in plan
@@ -0,0 +1,188 @@
+import asyncio
+import datetime
+import json
+from concurrent.futures import Future
+import pytest
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.domain import Company, FinancialWork, ReportTemplate, StatementType
+from app.services import batch_export_service, render_job_service
+from app.services.artifact_store import LocalArtifactStore, artifact_key
+from app.services.render_job_service import RenderTask
+
+
+class ManualExecutor:
+    """Queues submissions until run() so tests control when jobs finish."""
+
+    def __init__(self):
+        self.queued: list[tuple[Future, tuple]] = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.queued.append((future, (fn, args)))
+        return future
+
+    def run(self):
+        for future, (fn, args) in self.queued:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except Exception as e:
+                    future.set_exception(e)
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = ManualExecutor()
+    monkeypatch.setattr(render_job_service, "_get_executor", lambda: executor)
+    monkeypatch.setattr(render_job_service, "_jobs", {})
+    return executor
+
+
+@pytest.fixture
+def job_url(api_engine):
+    with Session(api_engine) as db:
+        company = Company(legal_name="Acme Pvt Ltd")
+        db.add(company)
+        db.flush()
+        work = FinancialWork(company_id=company.id, start_date=datetime.date(2024, 4, 1), end_date=datetime.date(2025, 3, 31))
+        template = ReportTemplate(name="Balance Sheet", statement_type=StatementType.BALANCE_SHEET,
+                                  template_definition=json.dumps([{"type": "section_title", "label": "Assets"}]))
+        db.add_all([work, template])
+        db.commit()
+        return f"/works/{work.id}/statements/{template.id}/jobs"
+
+
+def test_job_is_queued_then_downloadable(client, executor, job_url, monkeypatch):
+    monkeypatch.setattr(render_job_service, "_render", lambda *args: b"rendered " + args[-1].encode())
+    job = client.post(job_url, params={"format": "xlsx"})
+    assert job.status_code == 202
+    job_id = job.json()["id"]
+    assert client.get(f"/render-jobs/{job_id}").json()["status"] == "QUEUED"
+    assert client.get(f"/render-jobs/{job_id}/artifact").status_code == 409
+
+    executor.run()
+    assert client.get(f"/render-jobs/{job_id}").json()["status"] == "DONE"
+    artifact = client.get(f"/render-jobs/{job_id}/artifact")
+    assert artifact.content == b"rendered xlsx"
+    assert artifact.headers["content-disposition"] == "attachment; filename=Balance Sheet.xlsx"
+    assert client.get("/render-jobs/missing").status_code == 404
+
+
+def test_full_queue_is_rejected(client, executor, job_url, monkeypatch):
+    monkeypatch.setattr(settings, "RENDER_QUEUE_LIMIT", 1)
+    assert client.post(job_url).status_code == 202
+    assert client.post(job_url).status_code == 503
+    executor.run()
+    assert client.post(job_url).status_code == 202
+
+
+def test_failed_and_cancelled_jobs_report_status(client, executor, job_url, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("no fonts")
+
+    monkeypatch.setattr(render_job_service, "_render", fail)
+    failed = client.post(job_url).json()["id"]
+    cancelled = client.post(job_url).json()["id"]
+    executor.queued[1][0].cancel()
+    executor.run()
+
+    assert client.get(f"/render-jobs/{failed}").json() | {"id": None} == {
+        "id": None, "work_id": 1, "template_id": 1, "format": "pdf", "status": "FAILED", "error": "no fonts"}
+    assert client.get(f"/render-jobs/{failed}/artifact").status_code == 500
+    body = client.get(f"/render-jobs/{cancelled}").json()
+    assert (body["status"], body["error"]) == ("CANCELLED", "Render job was cancelled")
+    assert client.get(f"/render-jobs/{cancelled}/artifact").status_code == 409
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LocalArtifactStore(str(tmp_path), max_bytes=1 << 20)
+    monkeypatch.setattr(render_job_service, "artifact_store", store)
+    return store
+
+
+def _task(i: int, fmt: str = "pdf") -> RenderTask:
+    template = ReportTemplate(id=1, name="BS", template_definition="[]")
+    return RenderTask(f"work-{i}/bs.{fmt}", template, {}, {"by_sub_head": {1: i}, "by_head": {}, "by_category": {}}, fmt)
+
+
+def test_render_many_pulls_tasks_as_slots_free(executor, store):
+    pulled = []
+
+    async def tasks():
+        for i in range(5):
+            pulled.append(i)
+            yield _task(i)
+
+    async def main():
+        results = render_job_service.render_many(tasks(), max_in_flight=2)
+        first = asyncio.ensure_future(results.__anext__())
+        while len(executor.queued) < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        # Two renders pending and nothing more pulled until one finishes.
+        assert (pulled, len(executor.queued), first.done()) == ([0, 1], 2, False)
+        executor.queued[0][0].set_result(b"0")
+        task, content = await first
+        assert (task.name, content) == ("work-0/bs.pdf", b"0")
+
+        second = asyncio.ensure_future(results.__anext__())
+        while len(executor.queued) < 3:
+            await asyncio.sleep(0.01)
+        assert pulled == [0, 1, 2]
+        # The client disconnects: the response task is cancelled mid-stream.
+        second.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+
+    asyncio.run(main())
+    assert store.get(artifact_key(_task(0).template, _task(0).data, "pdf")) == b"0"
+    # Renders still queued when the stream stopped were cancelled.
+    assert [f.cancelled() for f, _ in executor.queued] == [False, True, True]
+
+
+def test_render_many_serves_cache_hits_without_rendering(executor, store):
+    cached = _task(0)
+    store.put(artifact_key(cached.template, cached.data, "pdf"), b"cached")
+
+    async def tasks():
+        yield cached
+
+    async def main():
+        return [r async for r in render_job_service.render_many(tasks())]
+
+    assert asyncio.run(main()) == [(cached, b"cached")]
+    assert executor.queued == []
+
+
+def test_batch_lists_failed_and_cancelled_renders_in_errors_txt(store, monkeypatch):
+    class Pool(ManualExecutor):
+        def submit(self, fn, *args):
+            future = super().submit(fn, *args)
+            task = len(self.queued) - 1
+            if task == 1:
+                future.set_exception(RuntimeError("no fonts"))
+            elif task == 2:
+                future.cancel()
+            else:
+                future.set_result(b"ok")
+            return future
+
+    pool = Pool()
+    monkeypatch.setattr(render_job_service, "_get_executor", lambda: pool)
+
+    async def tasks(*args):
+        for i in range(3):
+            yield _task(i)
+
+    monkeypatch.setattr(batch_export_service, "_tasks", tasks)
+
+    async def main():
+        return dict([f async for f in batch_export_service.batch_statement_files([], [], "pdf", None)])
+
+    files = asyncio.run(main())
+    assert files["work-0/bs.pdf"] == b"ok"
+    # Completion order, so compare the lines as a set.
+    assert set(files["errors.txt"].decode().splitlines()) == {
+        "work-1/bs.pdf: no fonts", "work-2/bs.pdf: render was cancelled"}
@@ -0,0 +1,39 @@
+import io
+import json
+from decimal import Decimal
+from openpyxl import load_workbook
+from app.models.domain import ReportTemplate
+from app.services.report_rendering_service import render_excel, render_excel_workbook
+
+TEMPLATE = ReportTemplate(id=1, name="Balance Sheet: FY 2024/25", template_definition=json.dumps([
+    {"type": "section_title", "label": "Assets"},
+    {"type": "sub_head", "account_id": 3},
+    {"type": "total", "label": "Total Assets", "account_id": 1},
+]))
+DATA = {"by_sub_head": {3: Decimal("10.50")}, "by_head": {}, "by_category": {1: Decimal("10.50")}}
+
+
+def _rows(ws):
+    return [[c.value for c in row] for row in ws.iter_rows() if any(c.value is not None for c in row)]
+
+
+def test_render_excel_writes_total_with_border():
+    ws = load_workbook(io.BytesIO(render_excel(TEMPLATE, {3: "Bank"}, DATA))).active
+    assert ws.title == "Balance Sheet  FY 2024 25"
+    assert _rows(ws) == [
+        ["Balance Sheet: FY 2024/25", None, None, None],
+        ["Assets", None, None, None],
+        [None, None, "Bank", 10.5],
+        [None, "Total Assets", None, 10.5],
+    ]
+    total = ws["D7"]
+    assert (total.value, total.font.b, total.border.top.style) == (10.5, True, "thin")
+
+
+def test_render_excel_workbook_gives_each_statement_a_unique_sheet():
+    wb = load_workbook(io.BytesIO(render_excel_workbook([(TEMPLATE, {3: "Bank"}, DATA)] * 2)))
+    assert wb.sheetnames == ["Balance Sheet  FY 2024 25", "Balance Sheet  FY 2024 25 (2)"]
+    ws = wb.worksheets[1]
+    assert _rows(ws)[-1] == [None, "Total Assets", None, 10.5]
+    total = ws["D7"]
+    assert (total.font.b, total.border.top.style) == (True, "thin")
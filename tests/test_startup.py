@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Budgets for `import app.main` in a fresh interpreter. Generous enough for
+# slow CI runners; loading any of the heavy backends blows through them.
+IMPORT_SECONDS_BUDGET = 3.0
+RSS_MB_BUDGET = 150
+LAZY_MODULES = ("weasyprint", "openpyxl", "jinja2", "pandas", "numpy", "alembic")
+
+# Peak RSS from VmHWM where available: ru_maxrss survives exec, so it would
+# include the memory of the (forked) pytest process.
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+try:
+    with open("/proc/self/status") as f:
+        rss_kb = next(int(l.split()[1]) for l in f if l.startswith("VmHWM:"))
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "rss_mb": rss_kb / 1024,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def test_worker_import_stays_lean():
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    probe = json.loads(out.stdout.strip().splitlines()[-1])
+    assert probe["loaded"] == []
+    assert probe["seconds"] < IMPORT_SECONDS_BUDGET
+    assert probe["rss_mb"] < RSS_MB_BUDGET
+
+
+def test_init_db_skips_schema_in_prod(monkeypatch):
+    from app.core import dependencies
+
+    def fail(**kwargs):
+        raise AssertionError("create_all ran in prod")
+
+    monkeypatch.setattr(dependencies.settings, "APP_ENV", "prod")
+    monkeypatch.setattr(dependencies.settings, "DB_INIT_MODE", None)
+    monkeypatch.setattr(dependencies.Base.metadata, "create_all", fail)
+    dependencies.init_db()
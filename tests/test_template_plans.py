@@ -0,0 +1,42 @@
+import json
+import pytest
+from app.models.domain import ReportTemplate
+from app.services.template_plan_service import (
+    LineKind,
+    TemplateDefinitionError,
+    compile_template,
+    get_render_plan,
+)
+
+DEFINITION = json.dumps([
+    {"type": "section_title", "label": "Assets"},
+    {"type": "head", "label": "Current Assets", "account_id": 2},
+    {"type": "sub_head", "label": "Bank", "account_id": 3},
+    {"type": "total", "label": "Total Assets", "account_id": 1},
+])
+
+
+def test_compile_lists_accounts_and_buckets():
+    plan = compile_template(7, DEFINITION)
+    assert plan.account_ids == {1, 2, 3}
+    assert [l.bucket for l in plan.lines] == [None, "by_head", "by_sub_head", "by_category"]
+    assert LineKind.TOTAL in plan.kinds
+
+
+@pytest.mark.parametrize("definition", [
+    "not json",
+    json.dumps({"type": "head"}),
+    json.dumps([{"type": "chart"}]),
+    json.dumps([{"type": "head", "label": "x"}]),
+])
+def test_invalid_definitions_are_rejected(definition):
+    with pytest.raises(TemplateDefinitionError):
+        compile_template(1, definition)
+
+
+def test_plan_is_cached_until_definition_changes():
+    template = ReportTemplate(id=42, name="BS", template_definition=DEFINITION)
+    plan = get_render_plan(template)
+    assert get_render_plan(template) is plan
+    template.template_definition = "[]"
+    assert get_render_plan(template) is not plan
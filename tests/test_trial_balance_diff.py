@@ -0,0 +1,86 @@
+import datetime
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from app.models.domain import (
+    AccountNodeType, Company, FinancialWork, MappedLedgerEntry, TrialBalanceEntry, TrialBalanceUpload, WorkSubHeadBalance,
+)
+from app.schemas.mapping_schemas import MapEntryPayload
+from app.services import account_service, balance_service, mapping_service
+from app.services.trial_balance_service import ingest_trial_balance, replace_trial_balance
+from app.utils.csv_parser import iter_trial_balance_batches
+
+FIRST = b"Account,Debit,Credit,Balance\nCash,100,,100\nRent,40,,40\nRent,5,,5\nSales,,145,-145\n"
+SECOND = b"Account,Debit,Credit,Balance\nCash,100,,100\nRent,50,,50\nSales,,150,-150\n"
+
+
+def _api_work(engine) -> int:
+    with Session(engine) as db:
+        company = Company(legal_name="Acme Pvt Ltd")
+        db.add(company)
+        db.flush()
+        work = FinancialWork(company_id=company.id, start_date=datetime.date(2024, 4, 1), end_date=datetime.date(2025, 3, 31))
+        db.add(work)
+        db.commit()
+        return work.id
+
+
+def _entries(db, work):
+    return {(e.account_name, e.closing_balance): e for e in db.query(TrialBalanceEntry).filter_by(financial_work_id=work.id)}
+
+
+def test_replace_writes_only_changed_lines_and_keeps_mappings(db, work):
+    cat = account_service.create_account(db, "Assets", AccountNodeType.CATEGORY)
+    sub = account_service.create_account(db, "Bank", AccountNodeType.SUB_HEAD, parent_id=cat.id)
+    ingest_trial_balance(db, work.id, iter_trial_balance_batches(FIRST))
+    before = _entries(db, work)
+    for key in [("Cash", Decimal(100)), ("Rent", Decimal(40)), ("Rent", Decimal(5))]:
+        mapping_service.create_mapping(db, MapEntryPayload(
+            trial_balance_entry_id=before[key].id, account_sub_head_id=sub.id))
+
+    result = replace_trial_balance(db, work.id, iter_trial_balance_batches(SECOND))
+    assert (result["inserted"], result["updated"], result["deleted"], result["unchanged"]) == (0, 2, 1, 1)
+
+    after = _entries(db, work)
+    assert sorted(after) == [("Cash", Decimal(100)), ("Rent", Decimal(50)), ("Sales", Decimal(-150))]
+    # Lines are updated in place: the first Rent keeps its id and mapping, the second is gone.
+    assert after[("Rent", Decimal(50))].id == before[("Rent", Decimal(40))].id
+    assert after[("Cash", Decimal(100))].mapped_entry is not None
+    assert db.query(MappedLedgerEntry).count() == 2
+    assert db.get(WorkSubHeadBalance, (work.id, sub.id)).balance == Decimal(150)
+    assert balance_service.verify_sub_head_balances(db, work.id) == []
+
+
+def test_replace_same_lines_compares_by_position(db, work):
+    ingest_trial_balance(db, work.id, iter_trial_balance_batches(FIRST))
+    version = work.data_version
+    result = replace_trial_balance(db, work.id, iter_trial_balance_batches(FIRST))
+    assert (result["inserted"], result["updated"], result["deleted"], result["unchanged"]) == (0, 0, 0, 4)
+    assert work.data_version == version
+
+    result = replace_trial_balance(db, work.id, iter_trial_balance_batches(FIRST.replace(b"Rent,5,,5", b"Rent,6,,6")))
+    assert (result["updated"], result["unchanged"]) == (1, 3)
+    assert ("Rent", Decimal(6)) in _entries(db, work)
+    assert work.data_version == version + 1
+
+
+def test_resent_upload_is_skipped_only_in_the_same_mode(client, api_engine):
+    work_id = _api_work(api_engine)
+
+    def upload(mode):
+        response = client.post(f"/works/{work_id}/trial-balance", params={"mode": mode},
+                               files={"file": ("tb.csv", FIRST, "text/csv")})
+        assert response.status_code == 200
+        return response.json()
+
+    first = upload("append")
+    again = upload("append")
+    assert (first["inserted"], first["duplicate"]) == (4, False)
+    assert (again["inserted"], again["duplicate"], again["sha256"]) == (0, True, first["sha256"])
+    # Same file in replace mode is not a repeat; it has nothing to change though.
+    replaced = upload("replace")
+    assert (replaced["duplicate"], replaced["unchanged"]) == (False, 4)
+
+    with Session(api_engine) as db:
+        assert db.query(TrialBalanceEntry).filter_by(financial_work_id=work_id).count() == 4
+        uploads = db.query(TrialBalanceUpload).filter_by(financial_work_id=work_id).order_by(TrialBalanceUpload.id)
+        assert [(u.sha256, u.mode) for u in uploads] == [(first["sha256"], "append"), (first["sha256"], "replace")]
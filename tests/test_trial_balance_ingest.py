@@ -0,0 +1,28 @@
+from decimal import Decimal
+import pytest
+from app.models.domain import TrialBalanceEntry
+from app.services.trial_balance_service import ingest_trial_balance
+from app.utils.csv_parser import iter_trial_balance_batches
+
+CSV = b"Account,Debit,Credit,Balance\n" + b"".join(f"Ledger {i},{i},,{i}\n".encode() for i in range(10))
+
+
+def test_ingest_streams_every_batch_in_one_transaction(db, work):
+    version = work.data_version
+    result = ingest_trial_balance(db, work.id, iter_trial_balance_batches(CSV, chunk_size=3))
+
+    assert result["inserted"] == 10
+    assert result["rows_per_sec"] >= 0
+    entries = db.query(TrialBalanceEntry).filter_by(financial_work_id=work.id).order_by(TrialBalanceEntry.id).all()
+    assert [(e.account_name, e.closing_balance) for e in entries] == [(f"Ledger {i}", Decimal(i)) for i in range(10)]
+    assert work.data_version == version + 1
+
+
+def test_failed_batch_rolls_back_earlier_batches(db, work):
+    def batches():
+        yield from iter_trial_balance_batches(CSV, chunk_size=3)
+        raise ValueError("bad chunk")
+
+    with pytest.raises(ValueError, match="bad chunk"):
+        ingest_trial_balance(db, work.id, batches())
+    assert db.query(TrialBalanceEntry).count() == 0
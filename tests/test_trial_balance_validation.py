@@ -0,0 +1,52 @@
+import pytest
+from decimal import Decimal
+from app.models.domain import TrialBalanceEntry
+from app.services.trial_balance_service import _copy_payload, ingest_trial_balance
+from app.services.trial_balance_validation import TrialBalanceInvalid, TrialBalanceValidator
+from app.utils.csv_parser import iter_trial_balance_batches
+
+CSV = (
+    "Account,Debit,Credit,Balance\n"
+    "Cash,100,,100\n"
+    "Sales,,140,-140\n"
+    ",10,,10\n"
+    "Cash,,,0\n"
+    "Rent,40,,4\n"
+).encode()
+
+
+def test_report_flags_each_check_across_batches():
+    validator = TrialBalanceValidator(max_issues=2)
+    rows = sum(len(b) for b in validator.validate(iter_trial_balance_batches(CSV, chunk_size=2)))
+    report = validator.report()
+    assert rows == report["rows"] == 5
+    assert not report["ok"]
+    assert report["counts"] == {"blank_name": 1, "duplicate_name": 1, "closing_mismatch": 1, "unbalanced": 1}
+    assert (report["total_debit"], report["total_credit"]) == (Decimal("150.00"), Decimal("140.00"))
+    assert report["issues"][0]["code"] == "unbalanced"
+    assert [(i["row"], i["code"]) for i in report["issues"][1:]] == [(3, "blank_name"), (4, "duplicate_name")]
+    assert report["truncated"]
+
+
+def test_closing_check_needs_its_own_column():
+    validator = TrialBalanceValidator()
+    list(validator.validate(iter_trial_balance_batches(b"Account,Debit,Credit\nCash,10,\nSales,,10\n")))
+    assert validator.report()["ok"]
+
+
+def test_strict_mode_stores_nothing(db, work):
+    validator = TrialBalanceValidator()
+
+    def reject():
+        if not validator.report()["ok"]:
+            raise TrialBalanceInvalid(validator.report())
+
+    with pytest.raises(TrialBalanceInvalid):
+        ingest_trial_balance(db, work.id, validator.validate(iter_trial_balance_batches(CSV)), before_commit=reject)
+    assert db.query(TrialBalanceEntry).count() == 0
+
+
+def test_copy_payload_quotes_blank_names():
+    # COPY ... FORMAT csv reads an unquoted empty field as NULL; account_name is NOT NULL.
+    [batch] = iter_trial_balance_batches(b"Account,Debit,Credit\n,10,\nCash,,1.5\n")
+    assert _copy_payload(7, batch) == b'7,"",10.0,0.0,0.0\n7,"Cash",0.0,1.5,1.5\n'
@@ -0,0 +1,50 @@
+import asyncio
+import datetime
+import hashlib
+import io
+import pytest
+from fastapi import UploadFile
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.domain import Company, FinancialWork, TrialBalanceEntry
+from app.utils.uploads import UploadTooLarge, spooled_upload
+
+CSV = b"Account,Debit,Credit,Balance\nCash,100,,100\nRent,40,,40\nRent,5,,5\nSales,,145,-145\n"
+
+
+def _spool(content: bytes, max_bytes: int) -> tuple[bytes, str]:
+    async def main():
+        digest = hashlib.sha256()
+        async with spooled_upload(UploadFile(io.BytesIO(content)), max_bytes, chunk_size=7, digest=digest) as spooled:
+            return spooled.read(), digest.hexdigest()
+    return asyncio.run(main())
+
+
+def test_spooled_upload_is_rewound_and_hashed():
+    content, sha256 = _spool(CSV, max_bytes=len(CSV))
+    assert content == CSV
+    assert sha256 == hashlib.sha256(CSV).hexdigest()
+
+
+def test_spooled_upload_stops_past_the_limit():
+    with pytest.raises(UploadTooLarge, match=f"exceeds the {len(CSV) - 1} byte limit"):
+        _spool(CSV, max_bytes=len(CSV) - 1)
+
+
+def test_oversized_upload_is_rejected_with_413(client, api_engine, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 64)
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_BYTES", 16)
+    with Session(api_engine) as db:
+        company = Company(legal_name="Acme Pvt Ltd")
+        db.add(company)
+        db.flush()
+        work = FinancialWork(company_id=company.id, start_date=datetime.date(2024, 4, 1), end_date=datetime.date(2025, 3, 31))
+        db.add(work)
+        db.commit()
+        work_id = work.id
+
+    response = client.post(f"/works/{work_id}/trial-balance", files={"file": ("tb.csv", CSV, "text/csv")})
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Upload exceeds the 64 byte limit."
+    with Session(api_engine) as db:
+        assert db.query(TrialBalanceEntry).count() == 0
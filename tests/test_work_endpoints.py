@@ -0,0 +1,36 @@
+import datetime
+from sqlalchemy.orm import Session
+from app.models.domain import Company, FinancialWork
+
+CSV = b"Account,Debit,Credit,Balance\nCash,100,,100\nRent,40,,40\nSales,,140,-140\n"
+
+
+def _api_work(engine) -> int:
+    with Session(engine) as db:
+        company = Company(legal_name="Acme Pvt Ltd")
+        db.add(company)
+        db.flush()
+        work = FinancialWork(company_id=company.id, start_date=datetime.date(2024, 4, 1), end_date=datetime.date(2025, 3, 31))
+        db.add(work)
+        db.commit()
+        return work.id
+
+
+def test_upload_is_stored_through_the_async_session(client, api_engine):
+    work_id = _api_work(api_engine)
+
+    response = client.post(f"/works/{work_id}/trial-balance", files={"file": ("tb.csv", CSV, "text/csv")})
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 3
+
+    entries = client.get(f"/works/{work_id}/unmapped-entries").json()
+    assert [(e["account_name"], e["closing_balance"]) for e in entries] == [("Cash", 100), ("Rent", 40), ("Sales", -140)]
+
+
+def test_async_endpoints_report_missing_rows(client, api_engine):
+    work_id = _api_work(api_engine)
+
+    response = client.post(f"/works/{work_id + 1}/trial-balance", files={"file": ("tb.csv", CSV, "text/csv")})
+    assert (response.status_code, response.json()["detail"]) == (404, "Work not found")
+    response = client.get(f"/works/{work_id}/statements/999")
+    assert (response.status_code, response.json()["detail"]) == (404, "Report template not found")